@@ -2,16 +2,40 @@
 Auditd collector - implements BaseCollector interface directly
 """
 import os
-import re
+import sys
 import threading
 import time
-from typing import Callable, Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import logging
 
 from .base import BaseCollector, SyscallEvent
+from .log_tailer import LogTailer
+
+try:
+    from core.syscall_table import syscall_name as syscall_name_for
+except ImportError:
+    from syscall_table import syscall_name as syscall_name_for
 
 logger = logging.getLogger('security_agent.collector.auditd')
 
+# Fields pulled from each SYSCALL record as (needle, terminator) pairs.
+# auditd always emits them in this order, so each search resumes where the
+# previous one ended. The leading space keeps ' pid=' from matching 'ppid='
+# and ' uid=' from matching 'auid='/'euid='.
+_SYSCALL_FIELDS = (
+    (b' syscall=', b' '),
+    (b' pid=', b' '),
+    (b' uid=', b' '),
+    (b' comm="', b'"'),
+    (b' exe="', b'"'),
+)
+
+# Syscalls always included in the per-event debug log
+_NETWORK_SYSCALLS = frozenset(('socket', 'connect', 'bind', 'accept', 'sendto', 'sendmsg'))
+
+# Emit an info-level progress summary every 4096 events
+_SUMMARY_EVERY_MASK = 0xFFF
+
 
 class AuditdCollector(BaseCollector):
     """Auditd-based syscall collector"""
@@ -20,39 +44,65 @@ class AuditdCollector(BaseCollector):
         super().__init__(config)
         self.audit_log_path = self.config.get('audit_log_path', '/var/log/audit/audit.log')
         self.thread: Optional[threading.Thread] = None
-        
-        # Regex to extract basic fields from auditd SYSCALL line
-        # Matches both numeric and named syscall tokens
-        # Example numeric: syscall=59; named: syscall=execve
-        self.syscall_re = re.compile(
-            r"type=SYSCALL .*?syscall=([^\s]+).*?pid=(\d+).*?uid=(\d+).*?comm=\"([^\"]*)\".*?exe=\"([^\"]*)\""
-        )
-        
-        # Simple syscall number to name map (subset); eBPF path has full map
-        # Network syscalls are critical for attack detection
-        self.syscall_num_to_name = {
-            '59': 'execve', '322': 'execveat', '57': 'fork', '56': 'clone', '58': 'vfork',
-            '257': 'openat', '2': 'open', '3': 'close', '0': 'read', '1': 'write',
-            '101': 'ptrace', '160': 'mount', '166': 'umount2', '105': 'setuid', '106': 'setgid',
-            '90': 'chmod', '92': 'chown', 
-            # Network syscalls (critical for attack detection)
-            '41': 'socket', '42': 'connect', '43': 'accept', '49': 'bind', '50': 'listen',
-            '44': 'sendto', '45': 'recvfrom', '46': 'sendmsg', '47': 'recvmsg'
-        }
+        self.read_chunk_size = self.config.get('audit_read_chunk_size', 65536)
+        self.poll_interval = self.config.get('audit_poll_interval', 0.1)  # Only used without inotify
+        self.batch_size = self.config.get('audit_batch_size', 32)  # Max events per callback batch
+        self.include_raw_line = self.config.get('include_raw_line', False)  # Attach raw record for debugging
     
     def is_available(self) -> bool:
         """Check if auditd is available"""
         return os.path.exists(self.audit_log_path) and os.access(self.audit_log_path, os.R_OK)
     
+    @staticmethod
+    def _parse_syscall_line(line: bytes) -> Optional[Tuple[str, str, str, str, str]]:
+        """
+        Extract (syscall, pid, uid, comm, exe) from a raw auditd SYSCALL line
+        
+        Walks the undecoded line once with bytes.find instead of running a
+        backtracking regex; only the extracted fields are decoded. Returns
+        None if a field is missing or pid/uid is not numeric. Handles both
+        numeric (syscall=59) and named (syscall=execve) tokens.
+        """
+        values = []
+        pos = 0
+        for needle, terminator in _SYSCALL_FIELDS:
+            start = line.find(needle, pos)
+            if start < 0:
+                return None
+            start += len(needle)
+            end = line.find(terminator, start)
+            if end < 0:
+                if terminator == b'"':
+                    return None
+                end = len(line)
+            values.append(line[start:end])
+            pos = end
+        
+        if not values[1].isdigit() or not values[2].isdigit():
+            return None
+        return tuple(v.decode('utf-8', errors='replace') for v in values)
+    
     def start_monitoring(self, event_callback: Callable[[SyscallEvent], None]) -> bool:
         """Start auditd monitoring"""
+        def dispatch(events: List[SyscallEvent]) -> None:
+            for event in events:
+                try:
+                    event_callback(event)
+                except Exception as e:
+                    # Ignore callback errors to keep tailing
+                    logger.warning(f"Callback error: {e}")
+        
+        return self.start_monitoring_batch(dispatch)
+    
+    def start_monitoring_batch(self, batch_callback: Callable[[List[SyscallEvent]], None]) -> bool:
+        """Start auditd monitoring, delivering up to batch_size events per call"""
         if not self.is_available():
             logger.error(f"Audit log not available: {self.audit_log_path}")
             return False
         
         try:
             self.running = True
-            self.thread = threading.Thread(target=self._tail_loop, args=(event_callback,), daemon=True)
+            self.thread = threading.Thread(target=self._tail_loop, args=(batch_callback,), daemon=True)
             self.thread.start()
             logger.info(f"✅ Auditd collector started monitoring {self.audit_log_path}")
             return True
@@ -66,79 +116,101 @@ class AuditdCollector(BaseCollector):
         self.running = False
         # Thread is daemon; it will exit shortly
     
-    def _tail_loop(self, event_callback: Callable[[SyscallEvent], None]):
-        """Tail audit log and emit events"""
+    def _tail_loop(self, batch_callback: Callable[[List[SyscallEvent]], None]):
+        """
+        Tail audit log and emit events in batches
+        
+        A batch is flushed when it reaches batch_size, and whatever is left
+        is flushed once the available lines are consumed, so batching never
+        holds events back while the tailer waits for new data.
+        """
         try:
             logger.info(f"Starting auditd tail loop for {self.audit_log_path}")
-            with open(self.audit_log_path, 'r', errors='ignore') as f:
-                # Seek to end for live tail
-                f.seek(0, os.SEEK_END)
+            # Tailer starts at the end of the file (live tail) and wakes on
+            # inotify instead of sleeping between empty reads
+            with LogTailer(self.audit_log_path, self.read_chunk_size, self.poll_interval) as tailer:
                 event_count = 0
+                batch: List[SyscallEvent] = []
                 while self.running:
-                    line = f.readline()
-                    if not line:
-                        time.sleep(0.1)
-                        continue
-                    
-                    # Only process SYSCALL lines
-                    if 'type=SYSCALL' not in line:
-                        continue
-                    
-                    m = self.syscall_re.search(line)
-                    if not m:
-                        logger.debug(f"Failed to parse auditd line: {line[:100]}")
-                        continue
-                    
-                    syscall_token, pid_str, uid_str, comm, exe = m.groups()
-                    pid = int(pid_str)
-                    uid = int(uid_str)
-                    
-                    # Prefer named token; if numeric, map best-effort
-                    if syscall_token.isdigit():
-                        syscall_name = self.syscall_num_to_name.get(syscall_token, f'syscall_{syscall_token}')
-                    else:
-                        syscall_name = syscall_token
-                    
-                    # IMPROVEMENT: Handle sudo-wrapped processes
-                    # If comm is "sudo" but exe contains python3, use python3 as the process name
-                    # This allows detection of attacks run via sudo python3 script.py
-                    resolved_comm = comm
-                    if comm == 'sudo' and exe and 'python' in exe.lower():
-                        # Extract python3 from exe path (e.g., /usr/bin/python3.10 -> python3)
-                        resolved_comm = 'python3'
-                        logger.debug(f"Resolved sudo process: PID={pid} exe={exe} -> comm={resolved_comm}")
-                    elif comm == 'sudo' and exe:
-                        # For other sudo processes, try to infer from exe
-                        exe_basename = os.path.basename(exe) if exe else ''
-                        if exe_basename and exe_basename != 'sudo':
-                            resolved_comm = exe_basename
+                    # Only SYSCALL records are pulled out of each block read (PATH,
+                    # CWD, PROCTITLE, ... are skipped in C), and they stay as
+                    # bytes until the fields we keep are decoded
+                    for line in tailer.read_matching_lines(b'type=SYSCALL', timeout=1.0):
+                        fields = self._parse_syscall_line(line)
+                        if not fields:
+                            logger.debug(f"Failed to parse auditd line: {line[:100]!r}")
+                            continue
+                        
+                        syscall_token, pid_str, uid_str, comm, exe = fields
+                        pid = int(pid_str)
+                        uid = int(uid_str)
+                        
+                        # Prefer named token; if numeric, map via the shared table
+                        if syscall_token.isdigit():
+                            syscall_name = syscall_name_for(syscall_token)
+                        else:
+                            # Lowercased to the canonical form, and interned so
+                            # per-process syscall windows share one string per name
+                            syscall_name = sys.intern(syscall_token.lower())
+                        
+                        # IMPROVEMENT: Handle sudo-wrapped processes
+                        # If comm is "sudo" but exe contains python3, use python3 as the process name
+                        # This allows detection of attacks run via sudo python3 script.py
+                        resolved_comm = comm
+                        if comm == 'sudo' and exe and 'python' in exe.lower():
+                            # Extract python3 from exe path (e.g., /usr/bin/python3.10 -> python3)
+                            resolved_comm = 'python3'
                             logger.debug(f"Resolved sudo process: PID={pid} exe={exe} -> comm={resolved_comm}")
-                    
-                    # Log network syscalls for debugging
-                    network_syscalls = ['socket', 'connect', 'bind', 'accept', 'sendto', 'sendmsg']
-                    is_network = syscall_name.lower() in network_syscalls
-                    if is_network or event_count < 10:
-                        logger.info(f"📥 auditd event: PID={pid} syscall={syscall_name} comm={resolved_comm} (original={comm}) exe={exe}")
-                    
-                    # Create SyscallEvent with resolved comm
-                    event = SyscallEvent(
-                        pid=pid,
-                        syscall=syscall_name,
-                        uid=uid,
-                        comm=resolved_comm,  # Use resolved comm instead of original
-                        exe=exe,
-                        timestamp=time.time(),
-                        event_info={'source': 'auditd', 'raw_line': line[:200], 'original_comm': comm}
-                    )
-                    
-                    try:
-                        event_callback(event)
+                        elif comm == 'sudo' and exe:
+                            # For other sudo processes, try to infer from exe
+                            exe_basename = os.path.basename(exe) if exe else ''
+                            if exe_basename and exe_basename != 'sudo':
+                                resolved_comm = exe_basename
+                                logger.debug(f"Resolved sudo process: PID={pid} exe={exe} -> comm={resolved_comm}")
+                        
+                        # Per-event logging is debug-only; formatting it on every
+                        # record dominated the loop at high event rates
+                        if logger.isEnabledFor(logging.DEBUG) and (
+                                event_count < 10 or syscall_name.lower() in _NETWORK_SYSCALLS):
+                            logger.debug(f"📥 auditd event: PID={pid} syscall={syscall_name} comm={resolved_comm} (original={comm}) exe={exe}")
+                        
+                        # Keep event_info minimal; the raw record is only attached on request
+                        event_info = {'source': 'auditd'}
+                        if resolved_comm != comm:
+                            event_info['original_comm'] = comm
+                        if self.include_raw_line:
+                            event_info['raw_line'] = line[:200].decode('utf-8', errors='replace')
+                        
+                        # Create SyscallEvent with resolved comm
+                        event = SyscallEvent(
+                            pid=pid,
+                            syscall=syscall_name,
+                            uid=uid,
+                            comm=resolved_comm,  # Use resolved comm instead of original
+                            exe=exe,
+                            timestamp=time.time(),
+                            event_info=event_info
+                        )
+                        batch.append(event)
                         event_count += 1
-                        if event_count % 100 == 0:
-                            logger.debug(f"Processed {event_count} auditd events")
-                    except Exception as e:
-                        # Ignore callback errors to keep tailing
-                        logger.warning(f"Callback error: {e}")
+                        if event_count & _SUMMARY_EVERY_MASK == 0:
+                            logger.info(f"📥 auditd collector processed {event_count} events")
+                        if len(batch) >= self.batch_size:
+                            self._flush_batch(batch, batch_callback)
+                            batch = []
+                    
+                    if batch:
+                        self._flush_batch(batch, batch_callback)
+                        batch = []
+                        logger.debug(f"Processed {event_count} auditd events")
         except Exception as e:
             logger.error(f"Error in auditd tail loop: {e}", exc_info=True)
             self.running = False
+    
+    def _flush_batch(self, batch: List[SyscallEvent],
+                     batch_callback: Callable[[List[SyscallEvent]], None]) -> None:
+        """Hand a batch to the callback, ignoring callback errors to keep tailing"""
+        try:
+            batch_callback(batch)
+        except Exception as e:
+            logger.warning(f"Batch callback error: {e}")
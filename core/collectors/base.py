@@ -2,7 +2,7 @@
 Abstract base class for syscall collectors
 """
 from abc import ABC, abstractmethod
-from typing import Callable, Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 from dataclasses import dataclass
 
 
@@ -10,7 +10,7 @@ from dataclasses import dataclass
 class SyscallEvent:
     """Unified syscall event structure"""
     pid: int
-    syscall: str
+    syscall: str  # Canonical lowercase name (e.g. 'openat'), matched as-is downstream
     uid: int = 0
     comm: str = ""
     exe: str = ""
@@ -39,6 +39,21 @@ class BaseCollector(ABC):
         """
         pass
     
+    def start_monitoring_batch(self, batch_callback: Callable[[List[SyscallEvent]], None]) -> bool:
+        """
+        Start monitoring syscalls, delivering events in batches
+        
+        Collectors that can amortize dispatch override this; the default
+        delivers each event as a single-item batch.
+        
+        Args:
+            batch_callback: Function to call with a list of syscall events
+            
+        Returns:
+            True if started successfully, False otherwise
+        """
+        return self.start_monitoring(lambda event: batch_callback([event]))
+    
     @abstractmethod
     def stop_monitoring(self) -> None:
         """Stop monitoring syscalls"""
@@ -11,6 +11,14 @@ from .auditd_collector import AuditdCollector
 logger = logging.getLogger('security_agent.collector.factory')
 
 
+def _discard(collector: BaseCollector) -> None:
+    """Release whatever a rejected collector's availability check loaded"""
+    try:
+        collector.stop_monitoring()
+    except Exception as e:
+        logger.debug(f"Error discarding {collector.get_name()}: {e}")
+
+
 def get_collector(config: Optional[Dict[str, Any]] = None, preferred: Optional[str] = None) -> Optional[BaseCollector]:
     """
     Get a collector with automatic fallback
@@ -32,6 +40,7 @@ def get_collector(config: Optional[Dict[str, Any]] = None, preferred: Optional[s
             logger.info("✅ Using auditd collector (as requested)")
             return collector
         else:
+            _discard(collector)
             logger.warning("⚠️ auditd not available, falling back to eBPF")
     
     if preferred == 'ebpf':
@@ -40,6 +49,7 @@ def get_collector(config: Optional[Dict[str, Any]] = None, preferred: Optional[s
             logger.info("✅ Using eBPF collector")
             return collector
         else:
+            _discard(collector)
             logger.warning("⚠️ eBPF not available, falling back to auditd")
     
     # Fallback to auditd if eBPF was preferred but failed
@@ -48,6 +58,7 @@ def get_collector(config: Optional[Dict[str, Any]] = None, preferred: Optional[s
         if collector.is_available():
             logger.info("✅ Using auditd collector (fallback)")
             return collector
+        _discard(collector)
     
     # Fallback to eBPF if auditd was preferred but failed
     if preferred == 'auditd':
@@ -55,6 +66,7 @@ def get_collector(config: Optional[Dict[str, Any]] = None, preferred: Optional[s
         if collector.is_available():
             logger.info("✅ Using eBPF collector (fallback)")
             return collector
+        _discard(collector)
     
     # No collector available
     logger.error("❌ No collectors available (eBPF and auditd both failed)")
@@ -32,9 +32,13 @@ class EBPFCollector(BaseCollector):
         """Check if eBPF is available"""
         if not EBPF_AVAILABLE:
             return False
+        if self.monitor is not None:
+            return True
         try:
-            # Try to create monitor to verify eBPF works
-            test_monitor = StatefulEBPFMonitor(self.config)
+            # Creating the monitor compiles and loads the BPF program; keep it
+            # so start_monitoring doesn't compile the same program again.
+            # An owner that never starts the collector releases it with stop_monitoring
+            self.monitor = StatefulEBPFMonitor(self.config)
             return True
         except Exception as e:
             logger.debug(f"eBPF not available: {e}")
@@ -46,8 +50,6 @@ class EBPFCollector(BaseCollector):
             return False
         
         try:
-            self.monitor = StatefulEBPFMonitor(self.config)
-            
             # Wrap callback to convert to SyscallEvent
             def wrapped_callback(pid: int, syscall: str, event_info: Dict[str, Any]):
                 event = SyscallEvent(
@@ -69,11 +71,17 @@ class EBPFCollector(BaseCollector):
             return False
     
     def stop_monitoring(self) -> None:
-        """Stop eBPF monitoring"""
-        self.running = False
+        """Stop eBPF monitoring, or release the program loaded by is_available()"""
         if self.monitor:
             try:
-                self.monitor.stop_monitoring()
+                if self.running:
+                    self.monitor.stop_monitoring()
+                else:
+                    # Never started: no poll thread, so a full cleanup can't hang
+                    self.monitor.cleanup()
             except Exception as e:
                 logger.debug(f"Error stopping eBPF monitor: {e}")
+            # The stopped monitor has released its BPF program; a restart loads a new one
+            self.monitor = None
+        self.running = False
 
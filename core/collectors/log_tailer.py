@@ -0,0 +1,163 @@
+"""
+Log tailer - follows a growing log file without fixed-interval polling
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger('security_agent.collector.tailer')
+
+# inotify constants (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+
+def _load_libc() -> Optional[ctypes.CDLL]:
+    """Load libc for inotify, or None if unavailable (non-Linux)"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class LogTailer:
+    """
+    Follow a log file from its current end and return complete lines.
+
+    Data is read in large chunks with os.read() and split in Python rather
+    than one readline() per line. When the file has no new data, the tailer
+    blocks on an inotify IN_MODIFY watch so new lines are picked up as soon
+    as they are written. If inotify is unavailable it falls back to sleeping
+    for poll_interval between reads.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 65536, poll_interval: float = 0.1):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.fd: Optional[int] = None
+        self._inotify_fd: Optional[int] = None
+        self._pending = b''
+
+    def open(self) -> None:
+        """Open the file, seek to the end and set up the inotify watch"""
+        self.fd = os.open(self.path, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+        os.lseek(self.fd, 0, os.SEEK_END)
+        self._pending = b''
+
+        libc = _load_libc()
+        if libc is None:
+            logger.debug("inotify unavailable, falling back to polling")
+            return
+
+        inotify_fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if inotify_fd < 0:
+            logger.debug(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+            return
+        if libc.inotify_add_watch(inotify_fd, os.fsencode(self.path), _IN_MODIFY) < 0:
+            logger.debug(f"inotify_add_watch failed: {os.strerror(ctypes.get_errno())}")
+            os.close(inotify_fd)
+            return
+        self._inotify_fd = inotify_fd
+
+    def close(self) -> None:
+        """Close the file and the inotify watch"""
+        for fd in (self.fd, self._inotify_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self.fd = None
+        self._inotify_fd = None
+
+    def __enter__(self) -> 'LogTailer':
+        self.open()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _read_available(self) -> bytes:
+        """Read everything currently available from the file"""
+        chunks = []
+        while True:
+            chunk = os.read(self.fd, self.chunk_size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if len(chunk) < self.chunk_size:
+                break
+        return b''.join(chunks)
+
+    def _wait(self, timeout: float) -> None:
+        """Block until the file is modified or timeout expires"""
+        if self._inotify_fd is None:
+            time.sleep(min(self.poll_interval, timeout))
+            return
+        ready, _, _ = select.select([self._inotify_fd], [], [], timeout)
+        if ready:
+            # Drain queued events; we only care that something changed
+            try:
+                while os.read(self._inotify_fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def read_lines(self, timeout: float = 1.0) -> List[str]:
+        """Return newly appended complete lines decoded as UTF-8"""
+        return [line.decode('utf-8', errors='ignore') for line in self.read_raw_lines(timeout)]
+
+    def _read_complete(self, timeout: float) -> bytes:
+        """
+        Return newly appended data up to and including the last newline
+
+        Waits up to timeout seconds for new data. A trailing partial line is
+        held back until its newline arrives. Returns b'' on timeout.
+        """
+        data = self._read_available()
+        if not data:
+            self._wait(timeout)
+            data = self._read_available()
+            if not data:
+                return b''
+
+        data = self._pending + data
+        end = data.rfind(b'\n') + 1
+        self._pending = data[end:]
+        return data[:end]
+
+    def read_raw_lines(self, timeout: float = 1.0) -> List[bytes]:
+        """Return newly appended complete lines as undecoded bytes"""
+        data = self._read_complete(timeout)
+        if not data:
+            return []
+        lines = data.split(b'\n')
+        lines.pop()  # Empty string after the final newline
+        return lines
+
+    def read_matching_lines(self, marker: bytes, timeout: float = 1.0) -> List[bytes]:
+        """
+        Return newly appended complete lines containing marker, undecoded
+
+        Locates matches with bytes.find over the whole block that was read,
+        so lines without the marker are never split out or visited in Python.
+        """
+        data = self._read_complete(timeout)
+        lines = []
+        find = data.find
+        pos = find(marker)
+        while pos >= 0:
+            start = data.rfind(b'\n', 0, pos) + 1
+            end = find(b'\n', pos)
+            lines.append(data[start:end])
+            pos = find(marker, end)
+        return lines
@@ -17,14 +17,132 @@ Improves MITRE ATT&CK coverage for:
 Author: Likitha Shankar
 """
 
+import itertools
+import math
 import time
-from collections import defaultdict, deque
-from typing import Dict, List, Tuple, Optional
-import statistics
+from collections import Counter, OrderedDict, defaultdict, deque
+from typing import Dict, List, Tuple, Optional, Sequence
 import logging
 
 logger = logging.getLogger('security_agent.connection_pattern')
 
+# Optional JIT for the beacon statistics kernel
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Below this many intervals the deque -> array conversion costs more than
+# the pure-Python loop, so the JIT kernel is only used for longer windows
+_JIT_MIN_INTERVALS = 16
+
+# Unique ports per PID are kept in a set until a PID has seen more than this
+# many, then moved to a fixed 8 KiB 65536-bit bitmap (a full scan's set of
+# 65536 ints would be several MB, but most PIDs only touch a few ports)
+_PORT_SET_MAX = 64
+
+# Static fields of each detection result; copied and filled in per alert
+_C2_TEMPLATE = {
+    'type': 'C2_BEACONING',
+    'technique': 'T1071',
+    'risk_score': 85,
+    'confidence': 0.9,
+    'severity': 'HIGH'
+}
+_PORT_SCAN_TEMPLATE = {
+    'type': 'PORT_SCANNING',
+    'technique': 'T1046',
+    'risk_score': 75,
+    'confidence': 0.85,
+    'severity': 'HIGH'
+}
+_EXFILTRATION_TEMPLATE = {
+    'type': 'DATA_EXFILTRATION',
+    'technique': 'T1041',
+    'risk_score': 90,
+    'confidence': 0.8,
+    'severity': 'CRITICAL'
+}
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _interval_stats_jit(times, m2_limit):
+        """Compiled Welford kernel; returns (ok, mean, variance)"""
+        mean = 0.0
+        m2 = 0.0
+        for i in range(1, times.shape[0]):
+            d = times[i] - times[i - 1]
+            delta = d - mean
+            mean += delta / i
+            m2 += delta * (d - mean)
+            if m2 >= m2_limit:
+                return False, 0.0, 0.0
+        return True, mean, m2 / (times.shape[0] - 2)
+
+
+def _interval_stats(times: Sequence[float], stdev_limit: float) -> Optional[Tuple[float, float, float]]:
+    """
+    Mean, sample variance and stdev of the gaps between successive timestamps
+    
+    Single-pass Welford accumulation over the intervals. Returns None when
+    there are fewer than 2 intervals, or as soon as the stdev is guaranteed
+    to end up >= stdev_limit (M2 never decreases, so once it reaches
+    stdev_limit^2 * (total - 1) the pattern can no longer be a beacon).
+    A separate min/max range filter would add nothing: for any prefix
+    M2 >= (max - min)^2 / 2, so the M2 check always fires first.
+    Long windows run through a Numba-compiled kernel when numba is installed.
+    """
+    total = len(times) - 1
+    if total < 2:
+        return None
+    
+    m2_limit = stdev_limit * stdev_limit * (total - 1)
+    if NUMBA_AVAILABLE and total >= _JIT_MIN_INTERVALS:
+        ok, mean, variance = _interval_stats_jit(
+            np.fromiter(times, dtype=np.float64, count=total + 1), m2_limit)
+        if not ok:
+            return None
+        return mean, variance, math.sqrt(variance)
+    
+    mean = 0.0
+    m2 = 0.0
+    n = 0
+    it = iter(times)
+    prev = next(it)
+    for t in it:
+        d = t - prev
+        prev = t
+        n += 1
+        delta = d - mean
+        mean += delta / n
+        m2 += delta * (d - mean)
+        if m2 >= m2_limit:
+            return None
+    
+    variance = m2 / (n - 1)
+    return mean, variance, math.sqrt(variance)
+
+
+class _StatCounter:
+    """Lock-free counter built on itertools.count"""
+    __slots__ = ('_count', '_reads')
+
+    def __init__(self):
+        self._count = itertools.count()
+        self._reads = itertools.count()
+
+    def increment(self):
+        # next() is a single C call, so concurrent increments are never lost
+        next(self._count)
+
+    @property
+    def value(self) -> int:
+        """Increments so far; each read advances the count once, so reads are subtracted"""
+        return next(self._count) - next(self._reads)
+
 
 class ConnectionPatternAnalyzer:
     """
@@ -43,16 +161,30 @@ class ConnectionPatternAnalyzer:
         """
         self.config = config or {}
         
-        # Connection tracking per process (by PID)
-        self.connection_history = defaultdict(lambda: deque(maxlen=100))
+        # Connection tracking per process (by PID), stored as parallel deques
+        # of primitives (timestamp, "IP:port", port) rather than one dict each
+        self.times = defaultdict(lambda: deque(maxlen=100))
+        self.dests = defaultdict(lambda: deque(maxlen=100))
+        self.ports = defaultdict(lambda: deque(maxlen=100))
+        
+        # Connection timestamps grouped by destination (pid -> "IP:port" -> times)
+        # Maintained incrementally so beacon detection doesn't regroup per event.
+        # Holds the same connections as the per-PID deques: an entry leaves its
+        # group when it rolls out of them, and empty groups are dropped
+        self.conns_by_pid_dest = defaultdict(lambda: defaultdict(deque))
         
         # Connection tracking by process name + IP (for C2 beaconing when PID changes)
-        # This helps track connections from short-lived processes
-        self.connection_history_by_name = defaultdict(lambda: defaultdict(lambda: deque(maxlen=100)))  # process_name -> dest_ip -> connections
+        # This helps track connections from short-lived processes. Kept in LRU
+        # order and capped, since names of exited processes are never reset
+        self.connection_history_by_name = OrderedDict()  # process_name -> dest_ip -> connections
+        # At least 1: the name being recorded must survive its own insertion
+        self.max_tracked_names = max(1, self.config.get('max_tracked_process_names', 10_000))
         
         # Port scanning detection
-        self.port_access_history = defaultdict(set)  # pid -> set of ports
-        self.port_access_history_by_name = defaultdict(lambda: defaultdict(set))  # process_name -> dest_ip -> set of ports
+        # Unique ports per PID: a set, or a port bitmap past _PORT_SET_MAX ports
+        self.ports_seen = defaultdict(set)  # pid -> set of ports | bytearray bitmap
+        self.port_count = defaultdict(int)  # pid -> unique ports seen
+        self.port_access_history_by_name = OrderedDict()  # process_name -> dest_ip -> set of ports
         
         # Beaconing detection parameters (optimized for better detection)
         self.beacon_threshold_variance = self.config.get('beacon_variance_threshold', 8.0)  # seconds (more lenient)
@@ -75,19 +207,23 @@ class ConnectionPatternAnalyzer:
             'curl', 'wget', 'ping', 'nslookup', 'dig',
             'docker', 'containerd', 'kubelet', 'kube-proxy'
         }
+        # Lowercased copy for O(1) case-insensitive lookups in analyze_connection
+        self._whitelisted_lc = frozenset(p.lower() for p in self.whitelisted_processes)
         
         # Data transfer tracking
         self.bytes_sent = defaultdict(int)
         self.bytes_received = defaultdict(int)
         self.exfiltration_threshold = self.config.get('exfiltration_threshold', 100 * 1024 * 1024)  # 100 MB
         
-        # Statistics
-        self.stats = {
-            'beacons_detected': 0,
-            'port_scans_detected': 0,
-            'exfiltrations_detected': 0,
-            'total_connections_analyzed': 0
+        # Statistics. Only these counters tolerate concurrent analyze_connection
+        # calls; the per-PID tracking above assumes a single writer
+        self._stat_counters = {
+            'beacons_detected': _StatCounter(),
+            'port_scans_detected': _StatCounter(),
+            'exfiltrations_detected': _StatCounter(),
+            'total_connections_analyzed': _StatCounter()
         }
+        self._total_counter = self._stat_counters['total_connections_analyzed']
     
     def analyze_connection(self, pid: int, dest_ip: str, dest_port: int, 
                           timestamp: float = None, process_name: str = None) -> Optional[Dict]:
@@ -107,123 +243,146 @@ class ConnectionPatternAnalyzer:
         if timestamp is None:
             timestamp = time.time()
         
+        # Normalize the name once; some sources wrap it in parentheses ("(python3)")
+        # and by-name tracking must use the same key regardless of source
+        clean_name = process_name
+        if clean_name and clean_name.startswith('(') and clean_name.endswith(')'):
+            clean_name = clean_name[1:-1]
+        
         # Skip detection for whitelisted legitimate processes
-        if process_name and process_name.lower() in [p.lower() for p in self.whitelisted_processes]:
+        if clean_name and clean_name.lower() in self._whitelisted_lc:
             return None
         
-        self.stats['total_connections_analyzed'] += 1
+        self._total_counter.increment()
         
         # Record connection by PID
-        connection_info = {
-            'dest': f"{dest_ip}:{dest_port}",
-            'ip': dest_ip,
-            'port': dest_port,
-            'time': timestamp,
-            'pid': pid
-        }
-        self.connection_history[pid].append(connection_info)
-        self.port_access_history[pid].add(dest_port)
-        
-        # DEBUG: Log port tracking
-        unique_count = len(self.port_access_history[pid])
-        if unique_count > 0 and unique_count % 3 == 0:  # Log every 3rd port
-            logger.info(f"🔍 Port tracking for PID {pid}: {unique_count} unique ports tracked (latest: {dest_port})")
+        dest_key = f"{dest_ip}:{dest_port}"
+        dests = self.dests[pid]
+        by_dest = self.conns_by_pid_dest[pid]
+        if len(dests) == dests.maxlen:
+            # The oldest connection is about to roll out; it is also the
+            # oldest entry of its destination group
+            oldest_dest = dests[0]
+            oldest_times = by_dest[oldest_dest]
+            oldest_times.popleft()
+            if not oldest_times:
+                del by_dest[oldest_dest]
+        self.times[pid].append(timestamp)
+        dests.append(dest_key)
+        self.ports[pid].append(dest_port)
+        dest_times = by_dest[dest_key]
+        dest_times.append(timestamp)
+        self._record_port(pid, dest_port)
+        
+        # DEBUG: Log port tracking (guarded - runs on every connection)
+        if logger.isEnabledFor(logging.DEBUG):
+            unique_count = self.port_count[pid]
+            if unique_count > 0 and unique_count % 3 == 0:  # Log every 3rd port
+                logger.debug("🔍 Port tracking for PID %s: %d unique ports tracked (latest: %s)",
+                             pid, unique_count, dest_port)
         
         # Also track by process name + IP (for C2 beaconing when PID changes)
-        if process_name:
-            self.connection_history_by_name[process_name][dest_ip].append(connection_info)
-            self.port_access_history_by_name[process_name][dest_ip].add(dest_port)
+        if clean_name:
+            connection_info = {
+                'dest': dest_key,
+                'ip': dest_ip,
+                'port': dest_port,
+                'time': timestamp,
+                'pid': pid
+            }
+            name_history, name_ports = self._ensure_process(clean_name)
+            history = name_history.get(dest_ip)
+            if history is None:
+                history = name_history[dest_ip] = deque(maxlen=100)
+            history.append(connection_info)
+            ports = name_ports.get(dest_ip)
+            if ports is None:
+                ports = name_ports[dest_ip] = set()
+            ports.add(dest_port)
         
         # Check for beaconing (try both PID and process name tracking)
-        beacon_result = self._detect_beaconing(pid)
-        if not beacon_result and process_name:
+        # Cheap reject: this destination doesn't have enough connections yet
+        beacon_result = None
+        if len(dest_times) >= self.min_connections_for_beacon:
+            beacon_result = self._detect_beaconing(pid, dest_key)
+        if not beacon_result and clean_name:
             # Try detecting by process name (for short-lived processes)
-            beacon_result = self._detect_beaconing_by_name(process_name, dest_ip)
+            beacon_result = self._detect_beaconing_by_name(clean_name, dest_ip)
         if beacon_result:
-            self.stats['beacons_detected'] += 1
+            self._stat_counters['beacons_detected'].increment()
             return beacon_result
         
         # Check for port scanning (try both PID and process name tracking)
         # IMPORTANT: Always check after adding port to history
         scan_result = self._detect_port_scanning(pid, timestamp)
-        if not scan_result and process_name:
+        if not scan_result and clean_name:
             # Try detecting by process name (for short-lived processes)
-            scan_result = self._detect_port_scanning_by_name(process_name, dest_ip, timestamp)
+            scan_result = self._detect_port_scanning_by_name(clean_name, dest_ip, timestamp)
         if scan_result:
-            self.stats['port_scans_detected'] += 1
-            logger.warning(f"🚨 PORT SCAN DETECTION RETURNED: {scan_result}")
+            self._stat_counters['port_scans_detected'].increment()
+            logger.debug("🚨 PORT SCAN DETECTION RETURNED: %s", scan_result)
             return scan_result
         
         return None
     
-    def _detect_beaconing(self, pid: int) -> Optional[Dict]:
+    def _ensure_process(self, process_name: str) -> Tuple[Dict[str, deque], Dict[str, set]]:
+        """
+        Get (dest_ip -> connections, dest_ip -> ports) for a process name
+        
+        Marks the name as most recently used and evicts the least recently
+        used name once more than max_tracked_names are tracked.
+        """
+        history = self.connection_history_by_name.get(process_name)
+        if history is None:
+            history = self.connection_history_by_name[process_name] = {}
+            ports = self.port_access_history_by_name[process_name] = {}
+            if len(self.connection_history_by_name) > self.max_tracked_names:
+                evicted, _ = self.connection_history_by_name.popitem(last=False)
+                self.port_access_history_by_name.pop(evicted, None)
+        else:
+            self.connection_history_by_name.move_to_end(process_name)
+            ports = self.port_access_history_by_name[process_name]
+        return history, ports
+    
+    def _detect_beaconing(self, pid: int, dest_key: str) -> Optional[Dict]:
         """
         Detect C2 beaconing patterns (regular intervals to SAME port)
         
         C2 malware often "calls home" at regular intervals (e.g., every 60 seconds)
         IMPORTANT: C2 beaconing requires connections to the SAME destination port
+        
+        Only the destination that just received a connection is checked; the
+        timings of every other destination are unchanged since their last check.
         """
-        all_connections = list(self.connection_history[pid])
+        # Timestamps are grouped by destination (IP:port) and appended in
+        # arrival order, so already sorted for one process
+        times = self.conns_by_pid_dest[pid][dest_key]
         
-        if len(all_connections) < self.min_connections_for_beacon:
+        # Check for regular timing (low variance = beaconing)
+        # Needs at least 2 intervals between connections to SAME destination
+        interval_stats = _interval_stats(times, self.beacon_threshold_variance)
+        if interval_stats is None:
             return None
+        mean_interval, variance, stdev = interval_stats
         
-        # Group connections by destination (IP:port) to find beaconing patterns
-        # C2 beaconing is to the SAME destination port
-        connections_by_dest = defaultdict(list)
-        for conn in all_connections:
-            dest_key = conn['dest']  # "IP:port"
-            connections_by_dest[dest_key].append(conn)
-        
-        # Check each destination for beaconing pattern
-        for dest_key, connections in connections_by_dest.items():
-            if len(connections) < self.min_connections_for_beacon:
-                continue
-            
-            # Sort by time to ensure correct order
-            connections = sorted(connections, key=lambda x: x['time'])
-            
-            # Calculate time intervals between connections to SAME destination
-            intervals = []
-            for i in range(1, len(connections)):
-                interval = connections[i]['time'] - connections[i-1]['time']
-                intervals.append(interval)
-            
-            if len(intervals) < self.min_connections_for_beacon - 1:
-                continue
-            
-            # Check for regular timing (low variance = beaconing)
-            try:
-                mean_interval = statistics.mean(intervals)
-                
-                # Only consider if intervals are reasonably long (>= min_beacon_interval)
-                if mean_interval < self.min_beacon_interval:
-                    continue
-                
-                # Calculate variance
-                if len(intervals) >= 2:
-                    variance = statistics.variance(intervals)
-                    stdev = statistics.stdev(intervals)
-                    
-                    # Low variance indicates regular beaconing
-                    # Lowered threshold: mean_interval >= 3.0 (was 5.0) for better detection
-                    if stdev < self.beacon_threshold_variance and mean_interval >= self.min_beacon_interval:
-                        return {
-                            'type': 'C2_BEACONING',
-                            'technique': 'T1071',
-                            'pid': pid,
-                            'mean_interval': mean_interval,
-                            'variance': variance,
-                            'stdev': stdev,
-                            'connections': len(connections),
-                            'destination': dest_key,
-                            'risk_score': 85,
-                            'explanation': f'Regular beaconing detected: {mean_interval:.1f}s intervals (±{stdev:.1f}s) to {dest_key}',
-                            'confidence': 0.9,
-                            'severity': 'HIGH'
-                        }
-            except statistics.StatisticsError:
-                continue
+        # Only consider if intervals are reasonably long (>= min_beacon_interval)
+        if mean_interval < self.min_beacon_interval:
+            return None
+        
+        # Low variance indicates regular beaconing
+        # Lowered threshold: mean_interval >= 3.0 (was 5.0) for better detection
+        if stdev < self.beacon_threshold_variance:
+            result = _C2_TEMPLATE.copy()
+            result.update(
+                pid=pid,
+                mean_interval=mean_interval,
+                variance=variance,
+                stdev=stdev,
+                connections=len(times),
+                destination=dest_key,
+                explanation=f'Regular beaconing detected: {mean_interval:.1f}s intervals (±{stdev:.1f}s) to {dest_key}'
+            )
+            return result
         
         return None
     
@@ -231,52 +390,36 @@ class ConnectionPatternAnalyzer:
         """
         Detect C2 beaconing by process name (handles short-lived processes)
         """
-        connections = list(self.connection_history_by_name[process_name][dest_ip])
+        connections = self.connection_history_by_name[process_name][dest_ip]
         
         if len(connections) < self.min_connections_for_beacon:
             return None
         
-        # Calculate time intervals between connections
-        intervals = []
-        for i in range(1, len(connections)):
-            interval = connections[i]['time'] - connections[i-1]['time']
-            intervals.append(interval)
+        # Check for regular timing (low variance = beaconing)
+        interval_stats = _interval_stats([conn['time'] for conn in connections],
+                                         self.beacon_threshold_variance)
+        if interval_stats is None:
+            return None
+        mean_interval, variance, stdev = interval_stats
         
-        if len(intervals) < self.min_connections_for_beacon - 1:
+        # Only consider if intervals are reasonably long (>= min_beacon_interval)
+        if mean_interval < self.min_beacon_interval:
             return None
         
-        # Check for regular timing (low variance = beaconing)
-        try:
-            mean_interval = statistics.mean(intervals)
-            
-            # Only consider if intervals are reasonably long (>= min_beacon_interval)
-            if mean_interval < self.min_beacon_interval:
-                return None
-            
-            # Calculate variance
-            if len(intervals) >= 2:
-                variance = statistics.variance(intervals)
-                stdev = statistics.stdev(intervals)
-                
-                # Low variance indicates regular beaconing
-                if stdev < self.beacon_threshold_variance and mean_interval >= self.min_beacon_interval:
-                    return {
-                        'type': 'C2_BEACONING',
-                        'technique': 'T1071',
-                        'pid': connections[-1]['pid'],  # Use most recent PID
-                        'process_name': process_name,
-                        'mean_interval': mean_interval,
-                        'variance': variance,
-                        'stdev': stdev,
-                        'connections': len(connections),
-                        'destination': connections[-1]['dest'],
-                        'risk_score': 85,
-                        'explanation': f'Regular beaconing detected: {mean_interval:.1f}s intervals (±{stdev:.1f}s)',
-                        'confidence': 0.9,
-                        'severity': 'HIGH'
-                    }
-        except statistics.StatisticsError:
-            pass
+        # Low variance indicates regular beaconing
+        if stdev < self.beacon_threshold_variance:
+            result = _C2_TEMPLATE.copy()
+            result.update(
+                pid=connections[-1]['pid'],  # Use most recent PID
+                process_name=process_name,
+                mean_interval=mean_interval,
+                variance=variance,
+                stdev=stdev,
+                connections=len(connections),
+                destination=connections[-1]['dest'],
+                explanation=f'Regular beaconing detected: {mean_interval:.1f}s intervals (±{stdev:.1f}s)'
+            )
+            return result
         
         return None
     
@@ -284,59 +427,58 @@ class ConnectionPatternAnalyzer:
         """
         Detect port scanning (accessing many ports quickly)
         """
-        unique_ports = len(self.port_access_history[pid])
+        unique_ports = self.port_count.get(pid, 0)
         
         # DEBUG: Log detection attempt
         if unique_ports > 0:
-            logger.info(f"🔍 Port scan detection check for PID {pid}: unique_ports={unique_ports}, threshold={self.port_scan_threshold}")
+            logger.debug("🔍 Port scan detection check for PID %s: unique_ports=%d, threshold=%s",
+                         pid, unique_ports, self.port_scan_threshold)
         
         if unique_ports < self.port_scan_threshold:
             if unique_ports > 0:
-                logger.info(f"   ❌ Not enough ports: {unique_ports} < {self.port_scan_threshold}")
+                logger.debug("   ❌ Not enough ports: %d < %s", unique_ports, self.port_scan_threshold)
             return None
         
         # Check if this happened in a short timeframe
-        connections = list(self.connection_history[pid])
-        if not connections:
-            logger.info(f"   ❌ No connection history for PID {pid}")
+        times = self.times.get(pid)
+        if not times:
+            logger.debug("   ❌ No connection history for PID %s", pid)
             return None
         
-        # Get time range
-        oldest = connections[0]['time']
-        newest = connections[-1]['time']
+        # Get time range (deque ends are O(1), no need to copy)
+        oldest = times[0]
+        newest = times[-1]
         timeframe = newest - oldest
         
-        logger.info(f"   🔍 Timeframe check: {timeframe:.1f}s < {self.port_scan_timeframe}s, unique_ports={unique_ports} >= {self.port_scan_threshold}")
+        logger.debug("   🔍 Timeframe check: %.1fs < %ss, unique_ports=%d >= %s",
+                     timeframe, self.port_scan_timeframe, unique_ports, self.port_scan_threshold)
         
         # Port scan: Many unique ports in short time
         # Also require minimum rate (ports per second) to reduce false positives
         if timeframe < self.port_scan_timeframe and unique_ports >= self.port_scan_threshold:
             ports_per_second = unique_ports / max(timeframe, 1)
             
-            logger.info(f"   🔍 Rate check: {ports_per_second:.3f} ports/sec >= {self.min_ports_per_second}")
+            logger.debug("   🔍 Rate check: %.3f ports/sec >= %s", ports_per_second, self.min_ports_per_second)
             
             # Require minimum rate (very lenient - allows slow scans)
             if ports_per_second < self.min_ports_per_second:
-                logger.warning(f"   ❌ Rate too low: {ports_per_second:.3f} < {self.min_ports_per_second}")
+                logger.debug("   ❌ Rate too low: %.3f < %s", ports_per_second, self.min_ports_per_second)
                 return None
             
             logger.warning(f"✅ PORT SCAN DETECTED: PID {pid}, {unique_ports} ports in {timeframe:.1f}s ({ports_per_second:.2f} ports/sec)")
             
-            return {
-                'type': 'PORT_SCANNING',
-                'technique': 'T1046',
-                'pid': pid,
-                'unique_ports': unique_ports,
-                'timeframe': timeframe,
-                'rate': ports_per_second,
-                'risk_score': 75,
-                'explanation': f'Port scanning: {unique_ports} ports in {timeframe:.1f}s ({ports_per_second:.2f} ports/sec)',
-                'confidence': 0.85,
-                'severity': 'HIGH'
-            }
+            result = _PORT_SCAN_TEMPLATE.copy()
+            result.update(
+                pid=pid,
+                unique_ports=unique_ports,
+                timeframe=timeframe,
+                rate=ports_per_second,
+                explanation=f'Port scanning: {unique_ports} ports in {timeframe:.1f}s ({ports_per_second:.2f} ports/sec)'
+            )
+            return result
         
         if timeframe >= self.port_scan_timeframe:
-            logger.warning(f"   ❌ Timeframe too long: {timeframe:.1f}s >= {self.port_scan_timeframe}s")
+            logger.debug("   ❌ Timeframe too long: %.1fs >= %ss", timeframe, self.port_scan_timeframe)
         
         return None
     
@@ -349,7 +491,7 @@ class ConnectionPatternAnalyzer:
         if unique_ports < self.port_scan_threshold:
             return None
         
-        connections = list(self.connection_history_by_name[process_name][dest_ip])
+        connections = self.connection_history_by_name[process_name][dest_ip]
         if not connections:
             return None
         
@@ -366,19 +508,16 @@ class ConnectionPatternAnalyzer:
             if ports_per_second < 0.1:
                 return None
             
-            return {
-                'type': 'PORT_SCANNING',
-                'technique': 'T1046',
-                'pid': connections[-1]['pid'],  # Use most recent PID
-                'process_name': process_name,
-                'unique_ports': unique_ports,
-                'timeframe': timeframe,
-                'rate': ports_per_second,
-                'risk_score': 75,
-                'explanation': f'Port scanning: {unique_ports} ports in {timeframe:.1f}s ({ports_per_second:.2f} ports/sec)',
-                'confidence': 0.85,
-                'severity': 'HIGH'
-            }
+            result = _PORT_SCAN_TEMPLATE.copy()
+            result.update(
+                pid=connections[-1]['pid'],  # Use most recent PID
+                process_name=process_name,
+                unique_ports=unique_ports,
+                timeframe=timeframe,
+                rate=ports_per_second,
+                explanation=f'Port scanning: {unique_ports} ports in {timeframe:.1f}s ({ports_per_second:.2f} ports/sec)'
+            )
+            return result
         
         return None
     
@@ -399,34 +538,27 @@ class ConnectionPatternAnalyzer:
         
         # Check for large uploads (potential exfiltration)
         if self.bytes_sent[pid] > self.exfiltration_threshold:
-            self.stats['exfiltrations_detected'] += 1
+            self._stat_counters['exfiltrations_detected'].increment()
             
-            return {
-                'type': 'DATA_EXFILTRATION',
-                'technique': 'T1041',
-                'pid': pid,
-                'bytes_sent': self.bytes_sent[pid],
-                'bytes_received': self.bytes_received[pid],
-                'ratio': self.bytes_sent[pid] / max(self.bytes_received[pid], 1),
-                'risk_score': 90,
-                'explanation': f'Large data upload: {self.bytes_sent[pid] / (1024*1024):.1f} MB sent',
-                'confidence': 0.8,
-                'severity': 'CRITICAL'
-            }
+            result = _EXFILTRATION_TEMPLATE.copy()
+            result.update(
+                pid=pid,
+                bytes_sent=self.bytes_sent[pid],
+                bytes_received=self.bytes_received[pid],
+                ratio=self.bytes_sent[pid] / max(self.bytes_received[pid], 1),
+                explanation=f'Large data upload: {self.bytes_sent[pid] / (1024*1024):.1f} MB sent'
+            )
+            return result
         
         return None
     
     def get_suspicious_destinations(self, pid: int) -> List[str]:
         """Get list of suspicious destinations for a process"""
-        connections = list(self.connection_history[pid])
-        
         # Look for unusual patterns
         suspicious = []
         
         # Group by destination
-        dest_counts = defaultdict(int)
-        for conn in connections:
-            dest_counts[conn['dest']] += 1
+        dest_counts = Counter(self.dests.get(pid, ()))
         
         # Single destination with many connections = suspicious
         for dest, count in dest_counts.items():
@@ -435,18 +567,55 @@ class ConnectionPatternAnalyzer:
         
         return suspicious
     
+    def _record_port(self, pid: int, port: int):
+        """Add a port to a PID's unique ports, moving them to a bitmap once there are many"""
+        seen = self.ports_seen[pid]
+        if type(seen) is set:
+            if port in seen:
+                return
+            seen.add(port)
+            if len(seen) > _PORT_SET_MAX:
+                bitmap = bytearray(8192)
+                for p in seen:
+                    bitmap[(p >> 3) & 0x1FFF] |= 1 << (p & 7)
+                self.ports_seen[pid] = bitmap
+        else:
+            idx = (port >> 3) & 0x1FFF
+            bit = 1 << (port & 7)
+            if seen[idx] & bit:
+                return
+            seen[idx] |= bit
+        self.port_count[pid] += 1
+    
+    def connection_count(self, pid: int) -> int:
+        """Number of recent connections tracked for a process"""
+        times = self.times.get(pid)
+        return len(times) if times else 0
+    
+    def last_connection(self, pid: int) -> Optional[Tuple[float, int]]:
+        """(timestamp, dest_port) of the most recent connection for a process"""
+        times = self.times.get(pid)
+        if not times:
+            return None
+        return times[-1], self.ports[pid][-1]
+    
     def get_stats(self) -> Dict:
         """Get detection statistics"""
-        return dict(self.stats)
+        return {key: counter.value for key, counter in self._stat_counters.items()}
     
-    def reset_process(self, pid: int):
-        """Reset tracking for a process (when it exits)"""
-        if pid in self.connection_history:
-            del self.connection_history[pid]
-        if pid in self.port_access_history:
-            del self.port_access_history[pid]
+    def reset_process(self, pid: int, process_name: Optional[str] = None):
+        """Reset tracking for a process (when it exits), including by-name history if given"""
+        self.times.pop(pid, None)
+        self.dests.pop(pid, None)
+        self.ports.pop(pid, None)
+        self.conns_by_pid_dest.pop(pid, None)
+        self.ports_seen.pop(pid, None)
+        self.port_count.pop(pid, None)
         if pid in self.bytes_sent:
             del self.bytes_sent[pid]
         if pid in self.bytes_received:
             del self.bytes_received[pid]
+        if process_name:
+            self.connection_history_by_name.pop(process_name, None)
+            self.port_access_history_by_name.pop(process_name, None)
 
@@ -29,6 +29,20 @@ from datetime import datetime
 import subprocess
 import re
 
+# Container ID in /proc/PID/cgroup: .../docker/<container-id> or .../kubepods/.../pod<pod-id>.
+# Compiled once and run over the raw file bytes ('.' does not cross lines)
+_CGROUP_CONTAINER_RE = re.compile(rb'/docker[:/]?([a-f0-9]{12,64})|/kubepods/.*/pod([a-f0-9-]+)')
+
+
+def _container_id_from_cgroup(data: bytes) -> Optional[str]:
+    """Short container ID (or 'k8s-<pod>') from /proc/PID/cgroup contents"""
+    match = _CGROUP_CONTAINER_RE.search(data)
+    if not match:
+        return None
+    if match.group(1):
+        return match.group(1)[:12].decode('ascii')  # Return short ID
+    return f"k8s-{match.group(2)[:8].decode('ascii')}"
+
 @dataclass
 class ContainerInfo:
     """Container information structure"""
@@ -109,7 +123,7 @@ class ContainerSecurityMonitor:
         self.process_containers = {}  # pid -> container_id
         
         # Cache for container lookups (PID -> container_id, with TTL)
-        self._container_lookup_cache = {}  # pid -> (container_id, timestamp)
+        self._container_lookup_cache = {}  # pid -> (container_id, monotonic timestamp)
         self._container_cache_ttl = 60  # 1 minute TTL
         
         # Security policies
@@ -365,12 +379,15 @@ class ContainerSecurityMonitor:
         if not isinstance(pid, int) or pid <= 0:
             return None
         
-        # Check cache first
-        current_time = time.time()
-        if pid in self._container_lookup_cache:
-            container_id, cache_time = self._container_lookup_cache[pid]
+        # Check cache first; entries expire individually on read, so hot
+        # PIDs stay cached and there is no periodic wipe-and-refill
+        current_time = time.monotonic()
+        cached = self._container_lookup_cache.get(pid)
+        if cached is not None:
+            container_id, cache_time = cached
             if current_time - cache_time < self._container_cache_ttl:
                 return container_id
+            del self._container_lookup_cache[pid]
         
         try:
             # Method 1: Use Docker API (most reliable if available)
@@ -379,17 +396,21 @@ class ContainerSecurityMonitor:
                     # Get process info
                     proc = psutil.Process(pid)
                     
-                    # Check if this process's ancestor is a container's main process
+                    # Check if this process's ancestor is a container's main process.
+                    # Index containers by main PID once so each ancestor is one lookup
+                    main_pids = {info.pid: cid for cid, info in self.containers.items()}
                     current_pid = pid
                     depth = 0
                     max_depth = 50
                     
                     while depth < max_depth:
                         try:
-                            for container_id, container_info in self.containers.items():
-                                if container_info.pid == current_pid:
-                                    # Found match - this is container's main process or descendant
-                                    return container_id[:12]  # Return short ID
+                            container_id = main_pids.get(current_pid)
+                            if container_id is not None:
+                                # Found match - this is container's main process or descendant
+                                result = container_id[:12]  # Return short ID
+                                self._container_lookup_cache[pid] = (result, current_time)
+                                return result
                             
                             # Check parent
                             parent = proc.parent()
@@ -404,21 +425,20 @@ class ContainerSecurityMonitor:
                 except Exception:
                     pass
             
-            # Method 2: Parse cgroup (improved regex)
-            cgroup_path = f"/proc/{pid}/cgroup"
-            if os.path.exists(cgroup_path):
-                with open(cgroup_path, 'r') as f:
-                    for line in f:
-                        # Docker pattern: .../docker/<12-char-container-id>
-                        docker_match = re.search(r'/docker[:\/]?([a-f0-9]{12,64})', line)
-                        if docker_match:
-                            container_id = docker_match.group(1)
-                            return container_id[:12]  # Return short ID
-                        
-                        # Kubernetes pattern: .../kubepods/.../pod<pod-id>
-                        k8s_match = re.search(r'/kubepods/.*/pod([a-f0-9-]+)', line)
-                        if k8s_match:
-                            return f"k8s-{k8s_match.group(1)[:8]}"
+            # Method 2: Parse cgroup - single raw read, one scan over all lines
+            try:
+                fd = os.open(f"/proc/{pid}/cgroup", os.O_RDONLY)
+            except OSError:
+                fd = None
+            if fd is not None:
+                try:
+                    cgroup_data = os.read(fd, 65536)
+                finally:
+                    os.close(fd)
+                container_id = _container_id_from_cgroup(cgroup_data)
+                if container_id:
+                    self._container_lookup_cache[pid] = (container_id, current_time)
+                    return container_id
             
             # Method 3: Check if already in our tracked containers
             for container_id, container_info in self.containers.items():
@@ -2,9 +2,19 @@
 Enhanced risk scoring system with behavioral baselining
 """
 import time
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
+from itertools import repeat
 from typing import Dict, List, Optional, Any
 
+# Risk weight for syscalls missing from base_risk_scores
+DEFAULT_SYSCALL_RISK = 2
+
+# Container escape and privilege escalation syscalls with their per-call risk
+CONTAINER_SYSCALL_RISK = {
+    'mount': 5, 'umount': 5, 'chroot': 5, 'pivot_root': 5, 'setns': 5,
+    'setuid': 3, 'setgid': 3, 'seteuid': 3, 'setegid': 3,
+}
+
 
 class EnhancedRiskScorer:
     """
@@ -56,6 +66,7 @@ class EnhancedRiskScorer:
         # Behavioral analysis
         self.behavioral_window = self.config.get('behavioral_window', 100)
         self.anomaly_weight = self.config.get('anomaly_weight', 0.3)
+        self.baseline_max_keys = int(self.config.get('baseline_max_keys', 500))
     
     def update_risk_score(self, pid: int, syscalls: List[str], 
                          process_info: Optional[Dict[str, Any]] = None, 
@@ -70,6 +81,7 @@ class EnhancedRiskScorer:
         if pid not in self.process_baselines:
             self.process_baselines[pid] = {
                 'syscall_frequencies': defaultdict(int),
+                'syscall_total': 0,  # Sum of syscall_frequencies
                 'temporal_patterns': deque(maxlen=self.behavioral_window),
                 'resource_usage': {},
                 'last_updated': current_time,
@@ -78,10 +90,8 @@ class EnhancedRiskScorer:
         
         baseline = self.process_baselines[pid]
         
-        # Calculate base risk score
-        base_score = 0.0
-        for syscall in syscalls:
-            base_score += self.base_risk_scores.get(syscall, 2)
+        # Calculate base risk score: one C-level pass of dict lookups
+        base_score = float(sum(map(self.base_risk_scores.get, syscalls, repeat(DEFAULT_SYSCALL_RISK))))
         
         # Normalize by number of syscalls
         if syscalls:
@@ -126,22 +136,21 @@ class EnhancedRiskScorer:
         
         baseline = self.process_baselines[pid]
         
-        # Calculate syscall frequency deviation
-        current_frequencies = defaultdict(int)
-        for syscall in syscalls:
-            current_frequencies[syscall] += 1
-        
         total_syscalls = len(syscalls)
         if total_syscalls == 0:
             return 0.0
         
+        # Calculate syscall frequency deviation
+        current_frequencies = Counter(syscalls)
+        
         # Compare with baseline
         deviation_score = 0.0
         # Total baseline counts
-        baseline_total = sum(baseline['syscall_frequencies'].values()) or 1
+        baseline_frequencies = baseline['syscall_frequencies']
+        baseline_total = baseline['syscall_total'] or 1
         for syscall, count in current_frequencies.items():
             current_freq = count / total_syscalls
-            baseline_freq = baseline['syscall_frequencies'].get(syscall, 0) / baseline_total
+            baseline_freq = baseline_frequencies.get(syscall, 0) / baseline_total
             
             # Calculate deviation
             deviation = abs(current_freq - baseline_freq)
@@ -162,20 +171,9 @@ class EnhancedRiskScorer:
         if not container_id:
             return 0.0
         
-        # Container-specific risk adjustments
-        container_risk = 0.0
-        
-        # Check for container escape attempts
-        escape_syscalls = ['mount', 'umount', 'chroot', 'pivot_root', 'setns']
-        for syscall in syscalls:
-            if syscall in escape_syscalls:
-                container_risk += 5
-        
-        # Check for privilege escalation
-        privilege_syscalls = ['setuid', 'setgid', 'seteuid', 'setegid']
-        for syscall in syscalls:
-            if syscall in privilege_syscalls:
-                container_risk += 3
+        # Container-specific risk adjustments: escape attempts (mount, chroot, ...)
+        # and privilege escalation (setuid, ...), in a single pass
+        container_risk = float(sum(map(CONTAINER_SYSCALL_RISK.get, syscalls, repeat(0))))
         
         return min(100.0, container_risk)
     
@@ -188,15 +186,18 @@ class EnhancedRiskScorer:
         baseline = self.process_baselines[pid]
         
         # Update syscall frequencies (cap size to avoid unbounded growth)
+        frequencies = baseline['syscall_frequencies']
         for syscall in syscalls:
-            baseline['syscall_frequencies'][syscall] += 1
+            frequencies[syscall] += 1
+        baseline['syscall_total'] += len(syscalls)
         # Cap to top-N most frequent entries
-        max_keys = int(self.config.get('baseline_max_keys', 500))
-        if len(baseline['syscall_frequencies']) > max_keys:
+        max_keys = self.baseline_max_keys
+        if len(frequencies) > max_keys:
             # Keep top-N by count
-            top_items = sorted(baseline['syscall_frequencies'].items(), key=lambda x: x[1], reverse=True)[:max_keys]
-            baseline['syscall_frequencies'].clear()
-            baseline['syscall_frequencies'].update(top_items)
+            top_items = sorted(frequencies.items(), key=lambda x: x[1], reverse=True)[:max_keys]
+            frequencies.clear()
+            frequencies.update(top_items)
+            baseline['syscall_total'] = sum(frequencies.values())
         
         # Update resource usage
         if process_info:
@@ -509,8 +509,18 @@ class EnhancedAnomalyDetector:
         """
         Detect anomalies using ensemble of ML models
         """
+        return self.detect_anomaly_ensemble_batch([(syscalls, process_info, pid)])[0]
+    
+    def detect_anomaly_ensemble_batch(self, samples: List[Tuple[List[str], Dict, Optional[int]]]) -> List[AnomalyResult]:
+        """
+        Detect anomalies for several (syscalls, process_info, pid) samples at once
+        
+        Features are stacked into one matrix so the scaler, PCA and each model
+        run once per batch rather than once per sample; results are in the
+        same order as samples.
+        """
         if not self.is_fitted:
-            return AnomalyResult(
+            return [AnomalyResult(
                 pid=pid or 0,
                 anomaly_score=0.0,
                 is_anomaly=False,
@@ -519,52 +529,50 @@ class EnhancedAnomalyDetector:
                 explanation="Models not trained",
                 timestamp=time.time(),
                 model_used="none"
-            )
+            ) for _, _, pid in samples]
+        if not samples:
+            return []
         
         # Extract features
-        features = self.extract_advanced_features(syscalls, process_info)
-        features_scaled = self.scaler.transform(features.reshape(1, -1))
+        features = np.vstack([self.extract_advanced_features(syscalls, process_info)
+                              for syscalls, process_info, _ in samples])
+        features_scaled = self.scaler.transform(features)
         features_pca = self.pca.transform(features_scaled)
         
-        # Ensemble predictions
-        predictions = {}
-        scores = {}
+        # Ensemble predictions, one (predictions, scores) array pair per model
+        model_outputs = {}
         
         # Isolation Forest
         if self.models_trained['isolation_forest']:
             try:
-                if_pred = self.isolation_forest.predict(features_pca)[0]
-                if_score = self.isolation_forest.decision_function(features_pca)[0]
-                predictions['isolation_forest'] = if_pred == -1
-                scores['isolation_forest'] = if_score
+                if_pred = self.isolation_forest.predict(features_pca)
+                if_score = self.isolation_forest.decision_function(features_pca)
+                model_outputs['isolation_forest'] = (if_pred, if_score)
             except Exception as e:
                 print(f"Isolation Forest prediction error: {e}")
         
         # One-Class SVM
         if self.models_trained['one_class_svm']:
             try:
-                svm_pred = self.one_class_svm.predict(features_pca)[0]
-                svm_score = self.one_class_svm.decision_function(features_pca)[0]
-                predictions['one_class_svm'] = svm_pred == -1
-                scores['one_class_svm'] = svm_score
+                svm_pred = self.one_class_svm.predict(features_pca)
+                svm_score = self.one_class_svm.decision_function(features_pca)
+                model_outputs['one_class_svm'] = (svm_pred, svm_score)
             except Exception as e:
                 print(f"One-Class SVM prediction error: {e}")
         
-        # DBSCAN - Note: DBSCAN doesn't work well for single-sample prediction
-        # We use the pre-fitted model's cluster centers to estimate distance
-        if self.models_trained['dbscan']:
-            try:
-                # DBSCAN is not designed for single-sample predictions
-                # Instead, use a distance-based approach to existing clusters
-                # If we have training data stored, we could use it, but for now,
-                # we'll use a simplified approach: check if point is within eps of any core sample
-                # Since DBSCAN is mainly for training/baseline, skip prediction on single samples
-                # and only use it during ensemble if we have batch data
-                # For single samples, use isolation forest and SVM only
-                pass  # Skip DBSCAN for single-sample predictions
-            except Exception as e:
-                pass  # Silently skip DBSCAN if it fails
+        # DBSCAN has no predict for new samples, so it only contributes at
+        # training time; isolation forest and SVM make up the live ensemble
         
+        results = []
+        for i, (syscalls, process_info, pid) in enumerate(samples):
+            predictions = {model: pred[i] == -1 for model, (pred, _) in model_outputs.items()}
+            scores = {model: score[i] for model, (_, score) in model_outputs.items()}
+            results.append(self._ensemble_result(syscalls, process_info, pid, features[i], predictions, scores))
+        return results
+    
+    def _ensemble_result(self, syscalls: List[str], process_info: Optional[Dict], pid: Optional[int],
+                         features: np.ndarray, predictions: Dict, scores: Dict) -> AnomalyResult:
+        """Combine one sample's per-model predictions and scores into an AnomalyResult"""
         # Ensemble decision
         anomaly_votes = sum(predictions.values())
         total_models = len(predictions)
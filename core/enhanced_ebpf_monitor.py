@@ -20,6 +20,11 @@ import ctypes
 # Setup logging
 logger = logging.getLogger('security_agent.ebpf')
 
+try:
+    from core.syscall_table import SYSCALL_NAMES, SYSCALL_NUMBERS
+except ImportError:
+    from syscall_table import SYSCALL_NAMES, SYSCALL_NUMBERS
+
 try:
     from bcc import BPF
     BCC_AVAILABLE = True
@@ -27,6 +32,36 @@ except ImportError:
     BCC_AVAILABLE = False
     logger.warning("BCC not available. Install with: sudo apt install python3-bpfcc")
 
+# Kernel comm buffer size, including the NUL terminator
+TASK_COMM_LEN = 16
+
+# BPF ring buffers need Linux 5.8+, raw tracepoints 4.17+
+RINGBUF_MIN_KERNEL = (5, 8)
+RAW_TRACEPOINT_MIN_KERNEL = (4, 17)
+
+# Layout of struct syscall_event in the BPF program: u32 pid, u32 syscall_num,
+# char comm[16], u64 timestamp (naturally aligned, no padding, 32 bytes)
+_SYSCALL_EVENT = struct.Struct(f'<II{TASK_COMM_LEN}sQ')
+
+
+def _parse_event(data) -> Tuple[int, int, str, int]:
+    """(pid, syscall_num, comm, timestamp_ns) from a raw event buffer address"""
+    pid, syscall_num, comm, timestamp = _SYSCALL_EVENT.unpack(
+        ctypes.string_at(data, _SYSCALL_EVENT.size))
+    return pid, syscall_num, comm.split(b'\0', 1)[0].decode('utf-8', errors='ignore').strip(), timestamp
+
+
+def _kernel_version(release: Optional[str] = None) -> Tuple[int, int]:
+    """(major, minor) of the running kernel, or (0, 0) if it can't be parsed"""
+    release = release or os.uname().release
+    try:
+        major, minor = release.split('.')[:2]
+        digits = len(minor) - len(minor.lstrip('0123456789'))
+        return int(major), int(minor[:digits] or 0)
+    except ValueError:
+        return (0, 0)
+
+
 @dataclass
 class ProcessState:
     """Stateful process tracking structure"""
@@ -70,6 +105,45 @@ class StatefulEBPFMonitor:
         # Performance tuning
         self.batch_size = self.config.get('batch_size', 1000)
         self.max_processes = self.config.get('max_processes', 10000)
+        # Ring buffer delivers events through one shared buffer instead of
+        # per-CPU perf buffers; falls back to perf buffer on older kernels
+        self.use_ringbuf = (self.config.get('ebpf_ringbuf', True)
+                            and _kernel_version() >= RINGBUF_MIN_KERNEL)
+        # With a drain interval the kernel submits without waking the poller
+        # and the ring buffer is drained on a timer instead (0 = wake per event)
+        self.ringbuf_drain_interval = self.config.get('ebpf_ringbuf_drain_ms', 10) / 1000.0
+        # Perf buffer samples reported lost (ring buffer drops are counted in the kernel)
+        self.lost_events = 0
+        # Raw tracepoint skips the per-event argument copy of the regular
+        # raw_syscalls:sys_enter tracepoint. It is already a direct call with
+        # no int3 trap, so fentry (one attachment per syscall function) would
+        # not be cheaper for tracing every syscall
+        self.use_raw_tracepoint = (self.config.get('ebpf_raw_tracepoint', True)
+                                   and _kernel_version() >= RAW_TRACEPOINT_MIN_KERNEL)
+        
+        # Syscalls dropped in the kernel before an event is built (e.g. noisy
+        # futex/sched_yield on busy hosts); unknown names are ignored
+        self.ignored_syscalls = sorted(
+            SYSCALL_NUMBERS[name] for name in self.config.get('ebpf_ignored_syscalls', [])
+            if name in SYSCALL_NUMBERS
+        )
+        
+        # (kind, name) of the probe the loaded program auto-attached, so
+        # stop_monitoring detaches exactly that one
+        self._attached_probe: Optional[Tuple[str, str]] = None
+        
+        # Processes whose events are dropped in the kernel. Names are matched
+        # against the kernel comm, which is truncated to TASK_COMM_LEN - 1 bytes
+        self.excluded_pids = sorted(set(self.config.get('ebpf_excluded_pids', [])))
+        self.excluded_comms = sorted({
+            name.encode('utf-8')[:TASK_COMM_LEN - 1]
+            for name in self.config.get('ebpf_excluded_comms', []) if name
+        })
+        
+        # BPF tables looked up by name, cached including misses
+        self._optional_tables: Dict[str, Any] = {}
+        # One preallocated ctypes key per table, reused for point lookups
+        self._table_keys: Dict[str, Any] = {}
         
         # Container awareness
         self.container_boundaries = {}
@@ -144,37 +218,97 @@ struct syscall_event {
 };
 
 // Maps
+#ifndef RINGBUF_SUBMIT_FLAGS
+#define RINGBUF_SUBMIT_FLAGS 0
+#endif
+
+#ifdef USE_RINGBUF
+BPF_RINGBUF_OUTPUT(syscall_events, 256);  // For sending events to userspace (256 pages)
+BPF_PERCPU_ARRAY(ringbuf_drops, u64, 1);  // Events dropped because the ring buffer was full
+#else
 BPF_PERF_OUTPUT(syscall_events);      // For sending events to userspace
-BPF_HASH(syscall_counts, u32, u64);  // For statistics
+#endif
+#ifdef FILTER_SYSCALLS
+BPF_ARRAY(ignored_syscalls, u8, 512);  // syscall number -> 1 if dropped
+#endif
+#ifdef FILTER_PROCESSES
+struct comm_key {
+    char comm[TASK_COMM_LEN];
+};
+BPF_HASH(excluded_pids, u32, u8, 4096);               // tgid -> 1 if dropped
+BPF_HASH(excluded_comms, struct comm_key, u8, 256);   // comm -> 1 if dropped
+#endif
+BPF_PERCPU_HASH(syscall_counts, u32, u64, 10240);  // For statistics, per-CPU so updates never contend
+
+static __always_inline void fill_event(struct syscall_event *event, u32 pid, int syscall_nr) {
+    event->pid = pid;
+    event->syscall_num = syscall_nr;
+    event->timestamp = bpf_ktime_get_ns();
+    bpf_get_current_comm(event->comm, sizeof(event->comm));
+}
 
 // Track syscalls and capture syscall numbers  
-TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
+static __always_inline int handle_sys_enter(void *ctx, int syscall_nr) {
+#ifdef FILTER_SYSCALLS
+    // Drop ignored syscalls before doing any other work
+    u32 nr = syscall_nr;
+    u8 *ignored = ignored_syscalls.lookup(&nr);
+    if (ignored && *ignored) {
+        return 0;
+    }
+#endif
     u64 id = bpf_get_current_pid_tgid();
     u32 pid = id >> 32;
-    int syscall_nr = (int)args->id;
+#ifdef FILTER_PROCESSES
+    // Drop excluded processes (the agent itself, system daemons) in the kernel
+    if (excluded_pids.lookup(&pid)) {
+        return 0;
+    }
+    struct comm_key key = {};
+    bpf_get_current_comm(key.comm, sizeof(key.comm));
+    if (excluded_comms.lookup(&key)) {
+        return 0;
+    }
+#endif
     
-    // Create event with REAL syscall data
+    // Create event with REAL syscall data and send it to userspace
+#ifdef USE_RINGBUF
+    // Written in place in the ring buffer - no stack copy
+    struct syscall_event *event = syscall_events.ringbuf_reserve(sizeof(struct syscall_event));
+    if (event) {
+        fill_event(event, pid, syscall_nr);
+        syscall_events.ringbuf_submit(event, RINGBUF_SUBMIT_FLAGS);
+    } else {
+        // Ring buffer full - count the drop like the perf buffer's lost callback
+        int zero = 0;
+        u64 *drops = ringbuf_drops.lookup(&zero);
+        if (drops) {
+            (*drops)++;
+        }
+    }
+#else
     struct syscall_event event = {};
-    event.pid = pid;
-    event.syscall_num = syscall_nr;
-    event.timestamp = bpf_ktime_get_ns();
-    
-    // Get process name
-    bpf_get_current_comm(event.comm, sizeof(event.comm));
-    
-    // Send event to userspace - using args as context for TRACEPOINT_PROBE
-    syscall_events.perf_submit(args, &event, sizeof(event));
+    fill_event(&event, pid, syscall_nr);
+    syscall_events.perf_submit(ctx, &event, sizeof(event));
+#endif
     
     // Also update count for statistics (always works)
-    u64 *count = syscall_counts.lookup(&pid);
-    u64 new_count = 1;
-    if (count) {
-        new_count = *count + 1;
-    }
-    syscall_counts.update(&pid, &new_count);
+    syscall_counts.increment(pid);
     
     return 0;
 }
+
+#ifdef USE_RAW_TP
+// args[0] is struct pt_regs *, args[1] the syscall number
+RAW_TRACEPOINT_PROBE(sys_enter) {
+    return handle_sys_enter(ctx, (int)ctx->args[1]);
+}
+#else
+TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
+    // Using args as context for TRACEPOINT_PROBE
+    return handle_sys_enter(args, (int)args->id);
+}
+#endif
 #pragma clang diagnostic pop
 """
         
@@ -207,7 +341,25 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
                 sys.stderr = devnull
                 
                 try:
-                    bpf = BPF(text=ebpf_code)
+                    cflags = ['-DFILTER_SYSCALLS'] if self.ignored_syscalls else []
+                    if self.excluded_pids or self.excluded_comms:
+                        cflags.append('-DFILTER_PROCESSES')
+                    optional_cflags = []
+                    if self.use_ringbuf:
+                        optional_cflags.append('-DUSE_RINGBUF')
+                        if self.ringbuf_drain_interval > 0:
+                            optional_cflags.append('-DRINGBUF_SUBMIT_FLAGS=BPF_RB_NO_WAKEUP')
+                    if self.use_raw_tracepoint:
+                        optional_cflags.append('-DUSE_RAW_TP')
+                    try:
+                        bpf = BPF(text=ebpf_code, cflags=cflags + optional_cflags)
+                    except Exception:
+                        if not optional_cflags:
+                            raise
+                        # bcc/kernel without ring buffer or raw tracepoint support
+                        self.use_ringbuf = False
+                        self.use_raw_tracepoint = False
+                        bpf = BPF(text=ebpf_code, cflags=cflags)
                 finally:
                     # Restore stderr
                     sys.stderr.close()
@@ -227,19 +379,43 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
                 except Exception as cleanup_error:
                     logger.warning(f"Failed to restore stderr file descriptor during cleanup: {cleanup_error}")
             
-            logger.info("eBPF program loaded successfully")
+            logger.info(f"eBPF program loaded successfully ({'ring buffer' if self.use_ringbuf else 'perf buffer'}, "
+                        f"{'raw tracepoint' if self.use_raw_tracepoint else 'tracepoint'})")
             
-            # Verify tracepoint is available
-            tracepoint_path = "/sys/kernel/debug/tracing/events/raw_syscalls/sys_enter"
-            if os.path.exists(tracepoint_path):
-                logger.debug(f"Tracepoint exists: {tracepoint_path}")
-            else:
-                # Try alternative path
-                alt_path = "/sys/kernel/tracing/events/raw_syscalls/sys_enter"
-                if os.path.exists(alt_path):
-                    logger.debug(f"Tracepoint exists (alt): {alt_path}")
+            # BCC auto-attaches (RAW_)TRACEPOINT_PROBE functions on load
+            self._attached_probe = (('raw_tracepoint', 'sys_enter') if self.use_raw_tracepoint
+                                    else ('tracepoint', 'raw_syscalls:sys_enter'))
+            
+            if self.ignored_syscalls:
+                ignored_table = bpf["ignored_syscalls"]
+                for nr in self.ignored_syscalls:
+                    ignored_table[ctypes.c_int(nr)] = ctypes.c_uint8(1)
+                logger.info(f"Dropping {len(self.ignored_syscalls)} ignored syscalls in the kernel")
+            
+            if self.excluded_pids or self.excluded_comms:
+                pid_table = bpf["excluded_pids"]
+                for pid in self.excluded_pids:
+                    pid_table[ctypes.c_uint32(pid)] = ctypes.c_uint8(1)
+                comm_table = bpf["excluded_comms"]
+                for comm in self.excluded_comms:
+                    key = comm_table.Key()
+                    key.comm = comm
+                    comm_table[key] = ctypes.c_uint8(1)
+                logger.info(f"Dropping events from {len(self.excluded_pids)} PIDs and "
+                            f"{len(self.excluded_comms)} process names in the kernel")
+            
+            # Verify tracepoint is available (raw tracepoints don't need tracefs)
+            if not self.use_raw_tracepoint:
+                tracepoint_path = "/sys/kernel/debug/tracing/events/raw_syscalls/sys_enter"
+                if os.path.exists(tracepoint_path):
+                    logger.debug(f"Tracepoint exists: {tracepoint_path}")
                 else:
-                    logger.warning(f"Tracepoint not found at {tracepoint_path} or {alt_path}")
+                    # Try alternative path
+                    alt_path = "/sys/kernel/tracing/events/raw_syscalls/sys_enter"
+                    if os.path.exists(alt_path):
+                        logger.debug(f"Tracepoint exists (alt): {alt_path}")
+                    else:
+                        logger.warning(f"Tracepoint not found at {tracepoint_path} or {alt_path}")
             
             return bpf
         except Exception as e:
@@ -278,15 +454,63 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
         # For now, policies are checked in userspace during event processing
         logger.debug("Policy update requested - currently handled in userspace")
     
+    def _optional_table(self, name: str) -> Optional[Any]:
+        """BPF table by name, or None if the loaded program doesn't define it"""
+        if name not in self._optional_tables:
+            try:
+                self._optional_tables[name] = self.bpf_program.get_table(name)
+            except Exception:
+                # Remember the miss so callers don't retry the lookup every time
+                self._optional_tables[name] = None
+        return self._optional_tables[name]
+    
+    def _table_key(self, name: str, table: Any, value: int) -> Any:
+        """Preallocated key for a table, set to value (valid until the next call)"""
+        key = self._table_keys.get(name)
+        if key is None:
+            key = self._table_keys[name] = table.Key()
+        key.value = value
+        return key
+    
+    def get_kernel_syscall_counts(self) -> Dict[int, int]:
+        """Per-PID syscall counts from the kernel map, summed across CPUs"""
+        counts_map = self._optional_table("syscall_counts") if self.bpf_program else None
+        if counts_map is None:
+            return {}
+        try:
+            return {key.value: counts_map.sum(key).value for key in counts_map.keys()}
+        except Exception as e:
+            logger.debug(f"Could not read syscall counts: {e}")
+            return {}
+    
+    def get_ringbuf_drops(self) -> int:
+        """Events the kernel dropped because the ring buffer was full, summed across CPUs"""
+        drops_map = self._optional_table("ringbuf_drops") if self.bpf_program else None
+        if drops_map is None:
+            return 0
+        try:
+            return drops_map.sum(self._table_key("ringbuf_drops", drops_map, 0)).value
+        except Exception as e:
+            logger.debug(f"Could not read ring buffer drops: {e}")
+            return 0
+    
+    def get_lost_events(self) -> int:
+        """Events lost before reaching userspace, from either buffer type"""
+        return self.lost_events + self.get_ringbuf_drops()
+    
     def get_process_state(self, pid: int) -> Optional[ProcessState]:
         """Get stateful information for a process"""
         if not self.bpf_program:
             return None
         
+        state_map = self._optional_table("process_states")
+        if state_map is None:
+            return None
+        
         try:
-            # Get process state from eBPF map
-            state_map = self.bpf_program.get_table("process_states")
-            state_data = state_map.get(pid)
+            # Get process state from eBPF map; the reused key avoids a ctypes
+            # allocation per lookup
+            state_data = state_map.get(self._table_key("process_states", state_map, pid))
             
             if state_data:
                 return ProcessState(
@@ -312,11 +536,17 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
         if not self.bpf_program:
             return False
         
+        container_map = self._optional_table("container_boundaries")
+        if container_map is None:
+            return False
+        
         try:
             # Get container boundaries from eBPF map
-            container_map = self.bpf_program.get_table("container_boundaries")
-            source_container = container_map.get(pid)
-            target_container = container_map.get(target_pid) if target_pid else None
+            # Both lookups share one preallocated key; each leaf is returned as
+            # its own object, so re-pointing the key is safe
+            source_container = container_map.get(self._table_key("container_boundaries", container_map, pid))
+            target_container = (container_map.get(self._table_key("container_boundaries", container_map, target_pid))
+                                if target_pid else None)
             
             # Check if this is a cross-container access
             if source_container and target_container and source_container != target_container:
@@ -403,55 +633,64 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
                     # (Only log at shutdown if needed)
                     self.lost_events += lost_cnt
 
-                self.bpf_program["syscall_events"].open_perf_buffer(
-                    self._process_perf_event,
-                    lost_cb=_lost_cb,
-                    page_cnt=256,  # Increased from 64 to reduce lost events (256 pages = ~1MB buffer)
-                )
-                logger.info("Perf event buffer attached")
+                events_table = self.bpf_program["syscall_events"]
+                if self.use_ringbuf:
+                    # Same (ctx, data, size) callback shape as the perf buffer
+                    events_table.open_ring_buffer(self._process_perf_event)
+                    logger.info("Ring buffer attached")
+                else:
+                    events_table.open_perf_buffer(
+                        self._process_perf_event,
+                        lost_cb=_lost_cb,
+                        page_cnt=256,  # Increased from 64 to reduce lost events (256 pages = ~1MB buffer)
+                    )
+                    logger.info("Perf event buffer attached")
                 
-                # VERIFY and AUTO-ENABLE tracepoint if needed
-                try:
-                    # Check if tracepoint is actually attached by looking at tracefs
-                    tracepoint_path = "/sys/kernel/debug/tracing/events/raw_syscalls/sys_enter/enable"
-                    alt_path = "/sys/kernel/tracing/events/raw_syscalls/sys_enter/enable"
+                # Raw tracepoints don't go through the tracefs event, so there is
+                # nothing to verify, and enabling it would only turn on ftrace output
+                if not self.use_raw_tracepoint:
+                    # VERIFY and AUTO-ENABLE tracepoint if needed
+                    try:
+                        # Check if tracepoint is actually attached by looking at tracefs
+                        tracepoint_path = "/sys/kernel/debug/tracing/events/raw_syscalls/sys_enter/enable"
+                        alt_path = "/sys/kernel/tracing/events/raw_syscalls/sys_enter/enable"
                     
-                    # Try primary path first
-                    if os.path.exists(tracepoint_path):
-                        with open(tracepoint_path, 'r') as f:
-                            enabled = f.read().strip()
-                            if enabled == "1":
-                                logger.debug("✅ Tracepoint is enabled")
-                            else:
-                                logger.warning(f"⚠️ Tracepoint enable file shows: {enabled}, attempting to enable...")
-                                try:
-                                    with open(tracepoint_path, 'w') as f:
-                                        f.write("1")
-                                    logger.info("✅ Tracepoint enabled successfully")
-                                except PermissionError:
-                                    logger.warning("⚠️ Cannot enable tracepoint (need root) - events may not be captured")
-                                except Exception as e:
-                                    logger.warning(f"⚠️ Failed to enable tracepoint: {e}")
-                    elif os.path.exists(alt_path):
-                        # Try alternative path
-                        with open(alt_path, 'r') as f:
-                            enabled = f.read().strip()
-                            if enabled == "1":
-                                logger.debug("✅ Tracepoint is enabled (alt path)")
-                            else:
-                                logger.warning(f"⚠️ Tracepoint enable file shows: {enabled}, attempting to enable...")
-                                try:
-                                    with open(alt_path, 'w') as f:
-                                        f.write("1")
-                                    logger.info("✅ Tracepoint enabled successfully (alt path)")
-                                except PermissionError:
-                                    logger.warning("⚠️ Cannot enable tracepoint (need root) - events may not be captured")
-                                except Exception as e:
-                                    logger.warning(f"⚠️ Failed to enable tracepoint: {e}")
-                    else:
-                        logger.warning("⚠️ Tracepoint path not found - eBPF may not work correctly")
-                except Exception as e:
-                    logger.debug(f"Could not verify/enable tracepoint status: {e}")
+                        # Try primary path first
+                        if os.path.exists(tracepoint_path):
+                            with open(tracepoint_path, 'r') as f:
+                                enabled = f.read().strip()
+                                if enabled == "1":
+                                    logger.debug("✅ Tracepoint is enabled")
+                                else:
+                                    logger.warning(f"⚠️ Tracepoint enable file shows: {enabled}, attempting to enable...")
+                                    try:
+                                        with open(tracepoint_path, 'w') as f:
+                                            f.write("1")
+                                        logger.info("✅ Tracepoint enabled successfully")
+                                    except PermissionError:
+                                        logger.warning("⚠️ Cannot enable tracepoint (need root) - events may not be captured")
+                                    except Exception as e:
+                                        logger.warning(f"⚠️ Failed to enable tracepoint: {e}")
+                        elif os.path.exists(alt_path):
+                            # Try alternative path
+                            with open(alt_path, 'r') as f:
+                                enabled = f.read().strip()
+                                if enabled == "1":
+                                    logger.debug("✅ Tracepoint is enabled (alt path)")
+                                else:
+                                    logger.warning(f"⚠️ Tracepoint enable file shows: {enabled}, attempting to enable...")
+                                    try:
+                                        with open(alt_path, 'w') as f:
+                                            f.write("1")
+                                        logger.info("✅ Tracepoint enabled successfully (alt path)")
+                                    except PermissionError:
+                                        logger.warning("⚠️ Cannot enable tracepoint (need root) - events may not be captured")
+                                    except Exception as e:
+                                        logger.warning(f"⚠️ Failed to enable tracepoint: {e}")
+                        else:
+                            logger.warning("⚠️ Tracepoint path not found - eBPF may not work correctly")
+                    except Exception as e:
+                        logger.debug(f"Could not verify/enable tracepoint status: {e}")
                     
             except Exception as e:
                 logger.error(f"Failed to open perf buffer: {e}", exc_info=True)
@@ -479,18 +718,49 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
         if not getattr(self, '_cleanup_done', False):
             try:
                 if self.bpf_program is not None:
-                    # Cleanup can sometimes hang - skip it on exit to avoid blocking
-                    # Kernel will cleanup automatically when process exits
-                    # Just mark as done, don't actually call cleanup (it can hang)
-                    pass  # Skip cleanup to avoid blocking exit
+                    # Full cleanup can sometimes hang - skip it on exit to avoid
+                    # blocking; the kernel releases buffers when the process exits.
+                    # Detaching the one probe we attached is cheap and stops the
+                    # program firing if the agent keeps running
+                    self._detach_probe()
                 
                 self._cleanup_done = True
                 # Log lost events summary only at shutdown
-                if hasattr(self, 'lost_events') and self.lost_events > 0:
-                    pass  #print(f"ℹ️  Total perf events lost: {self.lost_events}")
+                lost = self.get_lost_events()
+                if lost > 0:
+                    logger.info(f"ℹ️  Total events lost before userspace: {lost}")
             except Exception:
                 pass
     
+    def cleanup(self) -> None:
+        """Detach the probe and release the BPF program (for a monitor that never started)"""
+        self.running = False
+        if self.bpf_program is None:
+            return
+        self._detach_probe()
+        try:
+            self.bpf_program.cleanup()
+        except Exception as e:
+            logger.debug(f"Error cleaning up BPF program: {e}")
+        self.bpf_program = None
+        self._optional_tables.clear()
+        self._table_keys.clear()
+    
+    def _detach_probe(self) -> None:
+        """Detach the probe recorded at load time, if any"""
+        if self._attached_probe is None:
+            return
+        kind, name = self._attached_probe
+        try:
+            if kind == 'raw_tracepoint':
+                self.bpf_program.detach_raw_tracepoint(tp=name)
+            else:
+                self.bpf_program.detach_tracepoint(tp=name)
+            logger.debug(f"Detached {kind} {name}")
+        except Exception as e:
+            logger.debug(f"Could not detach {kind} {name}: {e}")
+        self._attached_probe = None
+    
     def _process_events(self):
         """Process eBPF events in background thread - READS REAL EVENTS"""
         logger.info(f"Starting syscall event loop (bpf_program={self.bpf_program is not None})")
@@ -505,7 +775,17 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
             return
         
         try:
-            # Poll perf buffer for REAL syscall events
+            # Poll ring/perf buffer for REAL syscall events
+            if self.use_ringbuf and self.ringbuf_drain_interval > 0:
+                def poll(timeout):
+                    # Events are submitted without wakeups; drain what has
+                    # accumulated, then wait for the next batch
+                    bpf_prog.ring_buffer_consume()
+                    time.sleep(self.ringbuf_drain_interval)
+            elif self.use_ringbuf:
+                poll = bpf_prog.ring_buffer_poll
+            else:
+                poll = bpf_prog.perf_buffer_poll
             poll_count = 0
             last_event_count = 0
             no_event_warnings = 0
@@ -535,7 +815,7 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
                     
                     # Use VERY short timeout to check self.running frequently
                     # This allows immediate exit when running=False
-                    bpf_prog.perf_buffer_poll(timeout=25)  # 25ms timeout - check exit very frequently
+                    poll(timeout=25)  # 25ms timeout - check exit very frequently
                     
                     # Check running flag immediately after each poll
                     if not self.running:
@@ -564,24 +844,19 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
     def _process_perf_event(self, cpu, data, size):
         """Process REAL perf events from eBPF"""
         try:
-            # Parse event from eBPF
-            event = self.bpf_program["syscall_events"].event(data)
-            
-            # Extract fields
-            pid = event.pid
-            syscall_num = event.syscall_num
+            # Parse event from eBPF with one struct unpack of the raw buffer
+            # instead of going through a ctypes Structure per field; comm
+            # (process name) is captured at kernel level
+            pid, syscall_num, comm, timestamp = _parse_event(data)
             syscall_name = self._syscall_num_to_name(syscall_num)
             
-            # Extract comm (process name) from eBPF event - captured at kernel level
-            comm = event.comm.decode('utf-8', errors='ignore').strip('\x00').strip()
-            
             # Store event
             self.events.append({
                 'pid': pid,
                 'syscall_num': syscall_num,
                 'syscall_name': syscall_name,
                 'comm': comm,  # Store comm for reference
-                'timestamp': event.timestamp
+                'timestamp': timestamp
             })
             
             # Update stats
@@ -595,7 +870,7 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
                         'syscall_num': syscall_num,
                         'syscall_name': syscall_name,  # ✅ REAL syscall name!
                         'comm': comm,  # ✅ Process name from eBPF kernel capture
-                        'timestamp': event.timestamp / 1e9  # Convert to seconds
+                        'timestamp': timestamp / 1e9  # Convert to seconds
                     })
                 except Exception as callback_error:
                     # Log callback errors but don't stop event processing
@@ -615,97 +890,8 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
     
     def _syscall_num_to_name(self, syscall_num: int) -> str:
         """Convert syscall number to name - complete x86_64 syscall table"""
-        # Complete Linux syscall table for x86_64
-        syscall_map = {
-            0: 'read', 1: 'write', 2: 'open', 3: 'close', 4: 'stat',
-            5: 'fstat', 6: 'lstat', 7: 'poll', 8: 'lseek', 9: 'mmap',
-            10: 'mprotect', 11: 'munmap', 12: 'brk', 13: 'rt_sigaction',
-            14: 'rt_sigprocmask', 15: 'rt_sigreturn', 16: 'ioctl', 17: 'pread64',
-            18: 'pwrite64', 19: 'readv', 20: 'writev', 21: 'access',
-            22: 'pipe', 23: 'select', 24: 'sched_yield', 25: 'mremap',
-            26: 'msync', 27: 'mincore', 28: 'madvise', 29: 'shmget',
-            30: 'shmat', 31: 'shmctl', 32: 'dup', 33: 'dup2', 34: 'pause',
-            35: 'nanosleep', 36: 'getitimer', 37: 'alarm', 38: 'setitimer',
-            39: 'getpid', 40: 'sendfile', 41: 'socket', 42: 'connect',
-            43: 'accept', 44: 'sendto', 45: 'recvfrom', 46: 'sendmsg',
-            47: 'recvmsg', 48: 'shutdown', 49: 'bind', 50: 'listen',
-            51: 'getsockname', 52: 'getpeername', 53: 'socketpair', 54: 'setsockopt',
-            55: 'getsockopt', 56: 'clone', 57: 'fork', 58: 'vfork', 59: 'execve',
-            60: 'exit', 61: 'wait4', 62: 'kill', 63: 'uname', 64: 'semget',
-            65: 'semop', 66: 'semctl', 67: 'shmdt', 68: 'msgget', 69: 'msgsnd',
-            70: 'msgrcv', 71: 'msgctl', 72: 'fcntl', 73: 'flock', 74: 'fsync',
-            75: 'fdatasync', 76: 'truncate', 77: 'ftruncate', 78: 'getdents',
-            79: 'getcwd', 80: 'chdir', 81: 'fchdir', 82: 'rename', 83: 'mkdir',
-            84: 'rmdir', 85: 'creat', 86: 'link', 87: 'unlink', 88: 'symlink',
-            89: 'readlink', 90: 'chmod', 91: 'fchmod', 92: 'chown', 93: 'fchown',
-            94: 'lchown', 95: 'umask', 96: 'gettimeofday', 97: 'getrlimit',
-            98: 'getrusage', 99: 'sysinfo', 100: 'times', 101: 'ptrace',
-            102: 'getuid', 103: 'syslog', 104: 'getgid', 105: 'setuid',
-            106: 'setgid', 107: 'geteuid', 108: 'getegid', 109: 'setpgid',
-            110: 'getppid', 111: 'getpgrp', 112: 'setsid', 113: 'setreuid',
-            114: 'setregid', 115: 'getgroups', 116: 'setgroups', 117: 'setresuid',
-            118: 'getresuid', 119: 'setresgid', 120: 'getresgid', 121: 'getpgid',
-            122: 'setfsuid', 123: 'setfsgid', 124: 'getsid', 125: 'capget',
-            126: 'capset', 127: 'rt_sigpending', 128: 'rt_sigtimedwait',
-            129: 'rt_sigqueueinfo', 130: 'rt_sigsuspend', 131: 'sigaltstack',
-            132: 'utime', 133: 'mknod', 134: 'uselib', 135: 'personality',
-            136: 'ustat', 137: 'statfs', 138: 'fstatfs', 139: 'sysfs',
-            140: 'getpriority', 141: 'setpriority', 142: 'sched_setparam',
-            143: 'sched_getparam', 144: 'sched_setscheduler', 145: 'sched_getscheduler',
-            146: 'sched_get_priority_max', 147: 'sched_get_priority_min',
-            148: 'sched_rr_get_interval', 149: 'mlock', 150: 'munlock',
-            151: 'mlockall', 152: 'munlockall', 153: 'vhangup', 154: 'modify_ldt',
-            155: 'pivot_root', 156: 'prctl', 157: 'arch_prctl', 158: 'adjtimex',
-            159: 'setrlimit', 160: 'chroot', 161: 'sync', 162: 'acct', 163: 'settimeofday',
-            164: 'mount', 165: 'umount2', 166: 'swapon', 167: 'swapoff',
-            168: 'reboot', 169: 'sethostname', 170: 'setdomainname', 171: 'iopl',
-            172: 'ioperm', 173: 'create_module', 174: 'init_module', 175: 'delete_module',
-            176: 'get_kernel_syms', 177: 'query_module', 178: 'quotactl', 179: 'nfsservctl',
-            180: 'getpmsg', 181: 'putpmsg', 182: 'afs_syscall', 183: 'tuxcall',
-            184: 'security', 185: 'gettid', 186: 'readahead', 187: 'setxattr',
-            188: 'lsetxattr', 189: 'fsetxattr', 190: 'getxattr', 191: 'lgetxattr',
-            192: 'fgetxattr', 193: 'listxattr', 194: 'llistxattr', 195: 'flistxattr',
-            196: 'removexattr', 197: 'lremovexattr', 198: 'fremovexattr', 199: 'tkill',
-            200: 'time', 201: 'futex', 202: 'sched_setaffinity', 203: 'sched_getaffinity',
-            204: 'set_thread_area', 205: 'io_setup', 206: 'io_destroy', 207: 'io_getevents',
-            208: 'io_submit', 209: 'io_cancel', 210: 'get_thread_area',
-            211: 'lookup_dcookie', 212: 'epoll_create', 213: 'epoll_ctl_old',
-            214: 'epoll_wait_old', 215: 'remap_file_pages', 216: 'getdents64',
-            217: 'set_tid_address', 218: 'restart_syscall', 219: 'semtimedop',
-            220: 'fadvise64', 221: 'timer_create', 222: 'timer_settime', 223: 'timer_gettime',
-            224: 'timer_getoverrun', 225: 'timer_delete', 226: 'clock_settime',
-            227: 'clock_gettime', 228: 'clock_getres', 229: 'clock_nanosleep',
-            230: 'exit_group', 231: 'epoll_wait', 232: 'epoll_ctl', 233: 'tgkill',
-            234: 'utimes', 235: 'vserver', 236: 'mbind', 237: 'set_mempolicy',
-            238: 'get_mempolicy', 239: 'mq_open', 240: 'mq_unlink', 241: 'mq_timedsend',
-            242: 'mq_timedreceive', 243: 'mq_notify', 244: 'mq_getsetattr',
-            245: 'kexec_load', 246: 'waitid', 247: 'add_key', 248: 'request_key',
-            249: 'keyctl', 250: 'ioprio_set', 251: 'ioprio_get', 252: 'inotify_init',
-            253: 'inotify_add_watch', 254: 'inotify_rm_watch', 255: 'migrate_pages',
-            256: 'openat', 257: 'mkdirat', 258: 'mknodat', 259: 'fchownat',
-            260: 'futimesat', 261: 'newfstatat', 262: 'unlinkat', 263: 'renameat',
-            264: 'linkat', 265: 'symlinkat', 266: 'readlinkat', 267: 'fchmodat',
-            268: 'faccessat', 269: 'pselect6', 270: 'ppoll', 271: 'unshare',
-            272: 'set_robust_list', 273: 'get_robust_list', 274: 'splice',
-            275: 'tee', 276: 'sync_file_range', 277: 'vmsplice', 278: 'move_pages',
-            279: 'utimensat', 280: 'epoll_pwait', 281: 'signalfd', 282: 'timerfd',
-            283: 'eventfd', 284: 'fallocate', 285: 'timerfd_settime', 286: 'timerfd_gettime',
-            287: 'accept4', 288: 'signalfd4', 289: 'eventfd2', 290: 'epoll_create1',
-            291: 'dup3', 292: 'pipe2', 293: 'inotify_init1', 294: 'preadv',
-            295: 'pwritev', 296: 'rt_tgsigqueueinfo', 297: 'perf_event_open',
-            298: 'recvmmsg', 299: 'fanotify_init', 300: 'fanotify_mark',
-            301: 'prlimit64', 302: 'name_to_handle_at', 303: 'open_by_handle_at',
-            304: 'clock_adjtime', 305: 'syncfs', 306: 'sendmmsg', 307: 'setns',
-            308: 'getcpu', 309: 'process_vm_readv', 310: 'process_vm_writev',
-            311: 'kcmp', 312: 'finit_module', 313: 'sched_setattr', 314: 'sched_getattr',
-            315: 'renameat2', 316: 'seccomp', 317: 'getrandom', 318: 'memfd_create',
-            319: 'kexec_file_load', 320: 'bpf', 321: 'execveat', 322: 'userfaultfd',
-            323: 'membarrier', 324: 'mlock2', 325: 'copy_file_range', 326: 'preadv2',
-            327: 'pwritev2', 328: 'pkey_mprotect', 329: 'pkey_alloc', 330: 'pkey_free',
-            331: 'statx', 332: 'io_pgetevents', 333: 'rseq'
-        }
-        
-        return syscall_map.get(syscall_num, f'syscall_{syscall_num}')
+        name = SYSCALL_NAMES.get(syscall_num)
+        return name if name is not None else f'syscall_{syscall_num}'
     
     def get_monitoring_stats(self) -> Dict[str, Any]:
         """Get monitoring statistics"""
@@ -714,6 +900,7 @@ TRACEPOINT_PROBE(raw_syscalls, sys_enter) {
             'active_policies': len(self.active_policies),
             'cross_container_attempts': len(self.cross_container_attempts),
             'total_events': len(self.events),
+            'lost_events': self.get_lost_events(),
             'syscall_stats': dict(self.syscall_stats)
         }
     
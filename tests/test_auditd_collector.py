@@ -0,0 +1,187 @@
+"""
+Unit tests for AuditdCollector line parsing and LogTailer
+"""
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add core to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+from collectors.auditd_collector import AuditdCollector
+from collectors.log_tailer import LogTailer
+
+
+SYSCALL_LINE = (
+    b'type=SYSCALL msg=audit(1700000000.123:4567): arch=c000003e syscall=59 '
+    b'success=yes exit=0 a0=55d1 a1=55d2 a2=55d3 a3=0 items=2 ppid=1200 pid=1234 '
+    b'auid=1000 uid=0 gid=0 euid=0 suid=0 fsuid=0 egid=0 sgid=0 fsgid=0 tty=pts0 '
+    b'ses=3 comm="python3" exe="/usr/bin/python3.10" key="exec"\n'
+)
+
+
+class TestAuditdCollectorParsing(unittest.TestCase):
+    """Test cases for AuditdCollector._parse_syscall_line"""
+
+    def test_parse_numeric_syscall(self):
+        """Test extraction of all fields from a numeric SYSCALL record"""
+        fields = AuditdCollector._parse_syscall_line(SYSCALL_LINE)
+        self.assertEqual(fields, ('59', '1234', '0', 'python3', '/usr/bin/python3.10'))
+
+    def test_parse_ignores_prefixed_keys(self):
+        """Test that ppid/auid are not mistaken for pid/uid"""
+        fields = AuditdCollector._parse_syscall_line(SYSCALL_LINE)
+        self.assertEqual(fields[1], '1234')
+        self.assertEqual(fields[2], '0')
+
+    def test_parse_named_syscall(self):
+        """Test named syscall tokens are passed through"""
+        line = SYSCALL_LINE.replace(b'syscall=59', b'syscall=execve')
+        fields = AuditdCollector._parse_syscall_line(line)
+        self.assertEqual(fields[0], 'execve')
+
+    def test_parse_missing_field(self):
+        """Test lines missing exe are rejected"""
+        line = SYSCALL_LINE.split(b' exe=')[0]
+        self.assertIsNone(AuditdCollector._parse_syscall_line(line))
+
+    def test_parse_unquoted_comm(self):
+        """Test hex-encoded (unquoted) comm is rejected like the old regex"""
+        line = SYSCALL_LINE.replace(b'comm="python3"', b'comm=707974686F6E')
+        self.assertIsNone(AuditdCollector._parse_syscall_line(line))
+
+    def test_parse_decodes_non_ascii_exe(self):
+        """Test only the extracted fields are decoded, tolerating bad bytes"""
+        line = SYSCALL_LINE.replace(b'/usr/bin/python3.10', b'/tmp/\xff\xfebin')
+        fields = AuditdCollector._parse_syscall_line(line)
+        self.assertEqual(fields[4], '/tmp/\ufffd\ufffdbin')
+
+
+class TestLogTailer(unittest.TestCase):
+    """Test cases for LogTailer"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.write(fd, b'existing line\n')
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def _append(self, data: bytes):
+        with open(self.path, 'ab') as f:
+            f.write(data)
+
+    def test_starts_at_end_of_file(self):
+        """Test existing content is skipped"""
+        with LogTailer(self.path) as tailer:
+            self.assertEqual(tailer.read_lines(timeout=0.01), [])
+            self._append(b'new line\n')
+            self.assertEqual(tailer.read_lines(timeout=0.01), ['new line'])
+
+    def test_partial_line_held_back(self):
+        """Test a line is only returned once its newline is written"""
+        with LogTailer(self.path) as tailer:
+            self._append(b'type=SYS')
+            self.assertEqual(tailer.read_lines(timeout=0.01), [])
+            self._append(b'CALL a=1\nsecond\n')
+            self.assertEqual(tailer.read_lines(timeout=0.01), ['type=SYSCALL a=1', 'second'])
+
+    def test_raw_lines_are_bytes(self):
+        """Test read_raw_lines returns undecoded lines"""
+        with LogTailer(self.path) as tailer:
+            self._append(b'comm="\xff"\n')
+            self.assertEqual(tailer.read_raw_lines(timeout=0.01), [b'comm="\xff"'])
+
+    def test_matching_lines(self):
+        """Test only complete lines containing the marker are returned"""
+        with LogTailer(self.path) as tailer:
+            self._append(b'type=SYSCALL a=1\ntype=PATH b=2\nx type=SYSCALL c=3\ntype=SYSCALL d=')
+            self.assertEqual(tailer.read_matching_lines(b'type=SYSCALL', timeout=0.01),
+                             [b'type=SYSCALL a=1', b'x type=SYSCALL c=3'])
+            self._append(b'4\n')
+            self.assertEqual(tailer.read_matching_lines(b'type=SYSCALL', timeout=0.01),
+                             [b'type=SYSCALL d=4'])
+
+
+class TestAuditdCollectorBatching(unittest.TestCase):
+    """Test cases for batched event delivery"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_batches_capped_and_flushed(self):
+        """Test events arrive in batches of at most batch_size with no remainder left behind"""
+        collector = AuditdCollector({'audit_log_path': self.path, 'audit_batch_size': 4})
+        batches = []
+        done = threading.Event()
+
+        def on_batch(events):
+            batches.append(events)
+            if sum(len(b) for b in batches) >= 10:
+                done.set()
+
+        self.assertTrue(collector.start_monitoring_batch(on_batch))
+        try:
+            time.sleep(0.2)
+            with open(self.path, 'ab') as f:
+                f.write(SYSCALL_LINE * 10)
+            self.assertTrue(done.wait(3.0))
+        finally:
+            collector.stop_monitoring()
+        self.assertEqual([len(b) for b in batches], [4, 4, 2])
+        self.assertEqual(batches[0][0].comm, 'python3')
+        self.assertEqual(batches[0][0].event_info, {'source': 'auditd'})
+
+    def test_named_syscalls_share_one_string(self):
+        """Test named syscall tokens are interned across events"""
+        collector = AuditdCollector({'audit_log_path': self.path, 'audit_batch_size': 2})
+        events = []
+        done = threading.Event()
+
+        def on_batch(batch):
+            events.extend(batch)
+            if len(events) >= 2:
+                done.set()
+
+        self.assertTrue(collector.start_monitoring_batch(on_batch))
+        try:
+            time.sleep(0.2)
+            with open(self.path, 'ab') as f:
+                f.write(SYSCALL_LINE.replace(b'syscall=59', b'syscall=openat') * 2)
+            self.assertTrue(done.wait(3.0))
+        finally:
+            collector.stop_monitoring()
+        self.assertEqual(events[0].syscall, 'openat')
+        self.assertIs(events[0].syscall, events[1].syscall)
+
+    def test_sudo_wrapped_python_matched_case_insensitively(self):
+        """Test a sudo event whose exe names Python in any case resolves to python3"""
+        collector = AuditdCollector({'audit_log_path': self.path, 'audit_batch_size': 1})
+        events = []
+        done = threading.Event()
+
+        def on_batch(batch):
+            events.extend(batch)
+            done.set()
+
+        self.assertTrue(collector.start_monitoring_batch(on_batch))
+        try:
+            time.sleep(0.2)
+            with open(self.path, 'ab') as f:
+                f.write(SYSCALL_LINE.replace(b'comm="python3"', b'comm="sudo"')
+                        .replace(b'/usr/bin/python3.10', b'/opt/PYTHON/bin/PYTHON3'))
+            self.assertTrue(done.wait(3.0))
+        finally:
+            collector.stop_monitoring()
+        self.assertEqual(events[0].comm, 'python3')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+"""
+Unit tests for ConnectionPatternAnalyzer
+"""
+import statistics
+import threading
+import unittest
+import sys
+import os
+
+# Add core to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+from connection_pattern_analyzer import ConnectionPatternAnalyzer, _StatCounter, _interval_stats
+
+
+class TestIntervalStats(unittest.TestCase):
+    """Test cases for the Welford interval statistics helper"""
+
+    def test_matches_statistics_module(self):
+        """Test mean/variance/stdev agree with the statistics module"""
+        times = [0.0, 10.0, 21.0, 30.5, 41.0, 50.0]
+        intervals = [b - a for a, b in zip(times, times[1:])]
+        mean, variance, stdev = _interval_stats(times, 100.0)
+        self.assertAlmostEqual(mean, statistics.mean(intervals))
+        self.assertAlmostEqual(variance, statistics.variance(intervals))
+        self.assertAlmostEqual(stdev, statistics.stdev(intervals))
+
+    def test_long_window_matches_statistics_module(self):
+        """Test long windows (JIT path when numba is installed) agree too"""
+        times = [i * 5.0 + (i % 3) * 0.25 for i in range(100)]
+        intervals = [b - a for a, b in zip(times, times[1:])]
+        mean, variance, stdev = _interval_stats(times, 100.0)
+        self.assertAlmostEqual(mean, statistics.mean(intervals))
+        self.assertAlmostEqual(variance, statistics.variance(intervals))
+        self.assertIsNone(_interval_stats(times, 0.1))
+
+    def test_too_few_intervals(self):
+        """Test fewer than 2 intervals returns None"""
+        self.assertIsNone(_interval_stats([1.0, 2.0], 100.0))
+
+    def test_early_exit_when_irregular(self):
+        """Test irregular intervals are rejected once stdev cannot drop below limit"""
+        self.assertIsNone(_interval_stats([0.0, 1.0, 100.0, 101.0], 8.0))
+
+    def test_single_outlier_rejects_long_window(self):
+        """Test one wide gap rejects an otherwise regular window"""
+        times = [i * 5.0 for i in range(10)] + [200.0] + [200.0 + i * 5.0 for i in range(1, 40)]
+        self.assertIsNone(_interval_stats(times, 8.0))
+
+
+class TestStatCounter(unittest.TestCase):
+    """Test cases for the lock-free statistics counter"""
+
+    def test_reads_do_not_advance_value(self):
+        """Test reading the value repeatedly returns the increment count"""
+        counter = _StatCounter()
+        self.assertEqual(counter.value, 0)
+        self.assertEqual(counter.value, 0)
+        counter.increment()
+        counter.increment()
+        self.assertEqual(counter.value, 2)
+        self.assertEqual(counter.value, 2)
+
+    def test_concurrent_increments_counted(self):
+        """Test increments from several threads are not lost"""
+        counter = _StatCounter()
+
+        def worker():
+            for _ in range(10000):
+                counter.increment()
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.value, 40000)
+
+
+class TestConnectionPatternAnalyzer(unittest.TestCase):
+    """Test cases for ConnectionPatternAnalyzer"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.analyzer = ConnectionPatternAnalyzer({})
+
+    def test_detects_regular_beaconing(self):
+        """Test regular connections to the same destination are flagged as C2"""
+        result = None
+        for i in range(4):
+            result = self.analyzer.analyze_connection(
+                pid=4242, dest_ip='10.0.0.5', dest_port=4444,
+                timestamp=1000.0 + i * 5.0, process_name='python3'
+            )
+        self.assertIsNotNone(result)
+        self.assertEqual(result['type'], 'C2_BEACONING')
+        self.assertEqual(result['technique'], 'T1071')
+        self.assertAlmostEqual(result['mean_interval'], 5.0)
+        self.assertEqual(result['destination'], '10.0.0.5:4444')
+        stats = self.analyzer.get_stats()
+        self.assertEqual(stats['total_connections_analyzed'], 4)
+        self.assertEqual(stats['beacons_detected'], 2)
+
+    def test_detects_port_scanning(self):
+        """Test rapid connections to many ports are flagged as a port scan"""
+        result = None
+        for i, port in enumerate(range(8000, 8010)):
+            result = self.analyzer.analyze_connection(
+                pid=5151, dest_ip='10.0.0.9', dest_port=port,
+                timestamp=2000.0 + i * 0.1, process_name='scanner'
+            )
+        self.assertIsNotNone(result)
+        self.assertEqual(result['type'], 'PORT_SCANNING')
+        self.assertEqual(result['unique_ports'], 10)
+
+    def test_unique_port_count(self):
+        """Test repeated ports are only counted once"""
+        for port in (80, 443, 80, 65535, 443, 0):
+            self.analyzer.analyze_connection(pid=5252, dest_ip='10.0.0.9', dest_port=port,
+                                             timestamp=1.0)
+        self.assertEqual(self.analyzer.port_count[5252], 4)
+        self.assertIsInstance(self.analyzer.ports_seen[5252], set)
+
+    def test_many_ports_move_to_bitmap(self):
+        """Test a PID past the set limit keeps counting unique ports in a bitmap"""
+        for port in list(range(1000, 1100)) + [1000, 1099, 2000]:
+            self.analyzer.analyze_connection(pid=5253, dest_ip='10.0.0.9', dest_port=port,
+                                             timestamp=1.0)
+        self.assertIsInstance(self.analyzer.ports_seen[5253], bytearray)
+        self.assertEqual(self.analyzer.port_count[5253], 101)
+
+    def test_destination_groups_bounded_by_history(self):
+        """Test a port sweep keeps only destinations still in the PID's history"""
+        for port in range(1, 1001):
+            self.analyzer.analyze_connection(pid=5254, dest_ip='10.0.0.9', dest_port=port,
+                                             timestamp=float(port))
+        by_dest = self.analyzer.conns_by_pid_dest[5254]
+        self.assertEqual(len(by_dest), 100)
+        self.assertEqual(set(by_dest), set(self.analyzer.dests[5254]))
+        self.assertNotIn('10.0.0.9:1', by_dest)
+        self.analyzer.reset_process(5253)
+        self.assertNotIn(5253, self.analyzer.ports_seen)
+        self.assertNotIn(5253, self.analyzer.port_count)
+
+    def test_whitelisted_process_ignored(self):
+        """Test whitelisted processes are skipped (case-insensitive)"""
+        for i in range(5):
+            result = self.analyzer.analyze_connection(
+                pid=6000, dest_ip='10.0.0.1', dest_port=80 + i,
+                timestamp=3000.0 + i, process_name='CURL'
+            )
+            self.assertIsNone(result)
+        self.assertEqual(self.analyzer.get_stats()['total_connections_analyzed'], 0)
+
+    def test_parenthesized_name_normalized(self):
+        """Test parenthesized names are tracked under the bare name"""
+        self.assertIsNone(self.analyzer.analyze_connection(
+            pid=6100, dest_ip='10.0.0.1', dest_port=80, timestamp=1.0, process_name='(curl)'))
+        self.analyzer.analyze_connection(pid=6200, dest_ip='10.0.0.3', dest_port=443,
+                                         timestamp=1.0, process_name='(agent)')
+        self.assertIn('10.0.0.3', self.analyzer.connection_history_by_name['agent'])
+
+    def test_reset_process(self):
+        """Test reset_process clears PID tracking"""
+        self.analyzer.analyze_connection(pid=7000, dest_ip='10.0.0.2', dest_port=22,
+                                         timestamp=1.0)
+        self.assertEqual(self.analyzer.last_connection(7000), (1.0, 22))
+        self.analyzer.reset_process(7000)
+        self.assertEqual(self.analyzer.connection_count(7000), 0)
+        self.assertIsNone(self.analyzer.last_connection(7000))
+
+    def test_name_history_evicts_least_recently_used(self):
+        """Test by-name history is capped and evicts the least recently used name"""
+        analyzer = ConnectionPatternAnalyzer({'max_tracked_process_names': 2})
+        for pid, name in ((1, 'a'), (2, 'b'), (1, 'a'), (3, 'c')):
+            analyzer.analyze_connection(pid=pid, dest_ip='10.0.0.4', dest_port=80,
+                                        timestamp=1.0, process_name=name)
+        self.assertEqual(list(analyzer.connection_history_by_name), ['a', 'c'])
+        self.assertEqual(list(analyzer.port_access_history_by_name), ['a', 'c'])
+
+    def test_name_history_cap_of_zero_keeps_current_name(self):
+        """Test a non-positive name cap still tracks the most recent name"""
+        analyzer = ConnectionPatternAnalyzer({'max_tracked_process_names': 0})
+        for i, name in enumerate(('a', 'b', 'b')):
+            analyzer.analyze_connection(pid=10 + i, dest_ip='10.0.0.4', dest_port=80,
+                                        timestamp=1.0 + i * 0.1, process_name=name)
+        self.assertEqual(list(analyzer.connection_history_by_name), ['b'])
+        self.assertEqual(list(analyzer.port_access_history_by_name), ['b'])
+
+    def test_reset_process_by_name(self):
+        """Test reset_process clears by-name tracking when a name is given"""
+        self.analyzer.analyze_connection(pid=7100, dest_ip='10.0.0.2', dest_port=22,
+                                         timestamp=1.0, process_name='agent')
+        self.analyzer.reset_process(7100, 'agent')
+        self.assertNotIn('agent', self.analyzer.connection_history_by_name)
+        self.assertNotIn('agent', self.analyzer.port_access_history_by_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
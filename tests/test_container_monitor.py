@@ -5,6 +5,8 @@ import unittest
 from unittest.mock import Mock, patch, MagicMock
 import sys
 import os
+import time
+import psutil  # Import before patch.dict(sys.modules) so it isn't unloaded on exit
 
 # Add core to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
@@ -62,6 +64,51 @@ class TestContainerSecurityMonitor(unittest.TestCase):
         self.monitor._create_container_policy('test_container')
         self.assertIn('test_container', self.monitor.container_policies)
 
+    def test_get_process_container_by_main_pid(self):
+        """Test a container's main process is attributed to that container"""
+        self.monitor.docker_client = MagicMock()
+        other = MagicMock()
+        other.pid = 999999
+        main = MagicMock()
+        main.pid = os.getpid()
+        self.monitor.containers['ffffffffffff0000'] = other
+        self.monitor.containers['abcdef0123456789'] = main
+        self.assertEqual(self.monitor._get_process_container(os.getpid()), 'abcdef012345')
+
+    def test_lookup_cache_expires_per_entry(self):
+        """Test a stale cache entry is dropped on read while fresh ones are kept"""
+        pid = os.getpid()
+        now = time.monotonic()
+        self.monitor._container_lookup_cache[pid] = ('stale0000000', now - 3600)
+        self.monitor._container_lookup_cache[pid + 1] = ('fresh0000000', now)
+        self.assertNotEqual(self.monitor._get_process_container(pid), 'stale0000000')
+        self.assertEqual(self.monitor._get_process_container(pid + 1), 'fresh0000000')
+        self.assertGreater(self.monitor._container_lookup_cache[pid][1], now - 3600)
+
+
+class TestCgroupParsing(unittest.TestCase):
+    """Test container ID extraction from /proc/PID/cgroup contents"""
+
+    def setUp(self):
+        with patch.dict('sys.modules', {'docker': MagicMock()}):
+            from container_security_monitor import _container_id_from_cgroup
+        self.parse = _container_id_from_cgroup
+
+    def test_docker_cgroup(self):
+        """Test docker cgroup lines yield the short container ID"""
+        data = (b'12:pids:/\n'
+                b'11:memory:/docker/0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef\n')
+        self.assertEqual(self.parse(data), '0123456789ab')
+
+    def test_kubernetes_cgroup(self):
+        """Test kubepods cgroup lines yield a k8s pod ID"""
+        data = b'0::/kubepods/burstable/pod1a2b3c4d-5e6f-7a8b/abcdef\n'
+        self.assertEqual(self.parse(data), 'k8s-1a2b3c4d')
+
+    def test_host_cgroup(self):
+        """Test host processes have no container ID"""
+        self.assertIsNone(self.parse(b'0::/user.slice/user-1000.slice/session-3.scope\n'))
+
 
 if __name__ == '__main__':
     unittest.main()
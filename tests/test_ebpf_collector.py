@@ -0,0 +1,65 @@
+"""
+Unit tests for EBPFCollector (no BCC required)
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Add core to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+from collectors import collector_factory, ebpf_collector
+from collectors.ebpf_collector import EBPFCollector
+
+
+class TestEBPFCollector(unittest.TestCase):
+    """Test cases for EBPFCollector monitor lifecycle"""
+
+    def setUp(self):
+        self.monitor_cls = MagicMock()
+        patcher = patch.object(ebpf_collector, 'StatefulEBPFMonitor', self.monitor_cls)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        availability = patch.object(ebpf_collector, 'EBPF_AVAILABLE', True)
+        availability.start()
+        self.addCleanup(availability.stop)
+
+    def test_program_loaded_once(self):
+        """Test the availability check's monitor is reused by start_monitoring"""
+        collector = EBPFCollector({})
+        self.assertTrue(collector.is_available())
+        self.assertTrue(collector.start_monitoring(lambda event: None))
+        self.assertEqual(self.monitor_cls.call_count, 1)
+
+    def test_restart_loads_new_program(self):
+        """Test a stopped collector builds a fresh monitor on restart"""
+        collector = EBPFCollector({})
+        self.assertTrue(collector.start_monitoring(lambda event: None))
+        collector.stop_monitoring()
+        self.assertIsNone(collector.monitor)
+        self.assertTrue(collector.start_monitoring(lambda event: None))
+        self.assertEqual(self.monitor_cls.call_count, 2)
+
+    def test_discarded_probe_releases_program(self):
+        """Test a collector that was probed but never started cleans up its program"""
+        collector = EBPFCollector({})
+        self.assertTrue(collector.is_available())
+        monitor = collector.monitor
+        collector.stop_monitoring()
+        monitor.cleanup.assert_called_once_with()
+        monitor.stop_monitoring.assert_not_called()
+        self.assertIsNone(collector.monitor)
+
+    def test_factory_discards_rejected_collector(self):
+        """Test the factory releases a collector it falls back from"""
+        with patch.object(collector_factory.AuditdCollector, 'is_available', return_value=False), \
+                patch.object(collector_factory.EBPFCollector, 'stop_monitoring') as ebpf_stop, \
+                patch.object(collector_factory.AuditdCollector, 'stop_monitoring') as auditd_stop:
+            collector = collector_factory.get_collector({}, preferred='auditd')
+        self.assertIsInstance(collector, EBPFCollector)
+        auditd_stop.assert_called_once_with()
+        ebpf_stop.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+"""
+Unit tests for the pure-Python parts of StatefulEBPFMonitor (no BCC required)
+"""
+import ctypes
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add core to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+from enhanced_ebpf_monitor import (StatefulEBPFMonitor, _kernel_version, _parse_event,
+                                   _SYSCALL_EVENT, RINGBUF_MIN_KERNEL, RAW_TRACEPOINT_MIN_KERNEL)
+
+
+class _SyscallEvent(ctypes.Structure):
+    """ctypes mirror of struct syscall_event, as BCC would generate it"""
+    _fields_ = [('pid', ctypes.c_uint32), ('syscall_num', ctypes.c_uint32),
+                ('comm', ctypes.c_char * 16), ('timestamp', ctypes.c_uint64)]
+
+
+class TestKernelVersion(unittest.TestCase):
+    """Test cases for kernel release parsing"""
+
+    def test_parse_release(self):
+        """Test distro suffixes are ignored"""
+        self.assertEqual(_kernel_version('5.15.0-91-generic'), (5, 15))
+        self.assertEqual(_kernel_version('6.1.0'), (6, 1))
+        self.assertEqual(_kernel_version('4.19rc1'), (4, 19))
+
+    def test_unparseable_release(self):
+        """Test garbage releases disable version-gated features"""
+        self.assertEqual(_kernel_version('unknown'), (0, 0))
+        self.assertLess(_kernel_version('unknown'), RINGBUF_MIN_KERNEL)
+
+    def test_ringbuf_gate(self):
+        """Test ring buffer gate boundary"""
+        self.assertLess(_kernel_version('5.4.0-150-generic'), RINGBUF_MIN_KERNEL)
+        self.assertGreaterEqual(_kernel_version('5.8.0'), RINGBUF_MIN_KERNEL)
+
+    def test_raw_tracepoint_gate(self):
+        """Test raw tracepoint gate boundary"""
+        self.assertLess(_kernel_version('4.15.0-213-generic'), RAW_TRACEPOINT_MIN_KERNEL)
+        self.assertGreaterEqual(_kernel_version('4.19.0'), RAW_TRACEPOINT_MIN_KERNEL)
+
+
+class _ProgramWithoutTables:
+    """Loaded-program stand-in that defines no tables"""
+
+    def __init__(self):
+        self.lookups = 0
+
+    def get_table(self, name):
+        self.lookups += 1
+        raise KeyError(name)
+
+
+class _ContainerTable(dict):
+    """BPF hash stand-in keyed by ctypes u32 values, like a BCC table"""
+    Key = ctypes.c_uint32
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.keys_seen = []
+
+    def get(self, key, default=None):
+        self.keys_seen.append(key)
+        return super().get(key.value, default)
+
+
+class TestOptionalTables(unittest.TestCase):
+    """Test cases for lookups of tables the program may not define"""
+
+    def setUp(self):
+        self.monitor = StatefulEBPFMonitor({})
+        self.program = _ProgramWithoutTables()
+        self.monitor.bpf_program = self.program
+
+    def test_missing_table_looked_up_once(self):
+        """Test a missing table is only looked up once"""
+        for pid in range(5):
+            self.assertIsNone(self.monitor.get_process_state(pid))
+            self.assertFalse(self.monitor.detect_cross_container_attempts(pid, 'ptrace', pid + 1))
+        self.assertEqual(self.program.lookups, 2)
+
+    def test_lookups_reuse_preallocated_key(self):
+        """Test point lookups reuse one ctypes key per table"""
+        table = _ContainerTable({100: 1, 200: 2})
+        self.monitor._optional_tables['container_boundaries'] = table
+        self.assertTrue(self.monitor.detect_cross_container_attempts(100, 'ptrace', 200))
+        self.assertFalse(self.monitor.detect_cross_container_attempts(100, 'ptrace', 300))
+        self.assertEqual(len({id(key) for key in table.keys_seen}), 1)
+
+    def test_kernel_syscall_counts_without_map(self):
+        """Test syscall counts are empty when the map is unavailable"""
+        self.assertEqual(self.monitor.get_kernel_syscall_counts(), {})
+        self.monitor.bpf_program = None
+        self.assertEqual(self.monitor.get_kernel_syscall_counts(), {})
+
+    def test_ringbuf_drops_count_as_lost(self):
+        """Test kernel ring buffer drops are summed into lost events"""
+        self.assertEqual(self.monitor.get_ringbuf_drops(), 0)
+        self.assertEqual(self.monitor.get_lost_events(), 0)
+        drops = MagicMock()
+        drops.Key = ctypes.c_int
+        drops.sum.return_value = ctypes.c_uint64(7)
+        self.monitor._optional_tables['ringbuf_drops'] = drops
+        self.monitor.lost_events = 3
+        self.assertEqual(self.monitor.get_monitoring_stats()['lost_events'], 10)
+        self.assertEqual(drops.sum.call_args[0][0].value, 0)
+
+
+class TestSyscallNames(unittest.TestCase):
+    """Test cases for syscall number to name mapping"""
+
+    def test_known_and_unknown(self):
+        """Test known numbers map to names and unknown ones get a placeholder"""
+        monitor = StatefulEBPFMonitor({})
+        self.assertEqual(monitor._syscall_num_to_name(59), 'execve')
+        self.assertEqual(monitor._syscall_num_to_name(42), 'connect')
+        self.assertEqual(monitor._syscall_num_to_name(9999), 'syscall_9999')
+
+    def test_numbers_past_sysctl(self):
+        """Test numbers after the _sysctl slot (156) are not shifted"""
+        monitor = StatefulEBPFMonitor({})
+        self.assertEqual(monitor._syscall_num_to_name(156), '_sysctl')
+        self.assertEqual(monitor._syscall_num_to_name(165), 'mount')
+        self.assertEqual(monitor._syscall_num_to_name(257), 'openat')
+        self.assertEqual(monitor._syscall_num_to_name(322), 'execveat')
+
+
+class TestIgnoredSyscalls(unittest.TestCase):
+    """Test cases for the kernel-side syscall filter configuration"""
+
+    def test_names_resolved_to_numbers(self):
+        """Test ignored syscall names become sorted numbers, skipping unknown names"""
+        monitor = StatefulEBPFMonitor({'ebpf_ignored_syscalls': ['sched_yield', 'futex', 'bogus']})
+        self.assertEqual(monitor.ignored_syscalls, [24, 202])
+
+    def test_default_filters_nothing(self):
+        """Test no syscalls are dropped unless configured"""
+        self.assertEqual(StatefulEBPFMonitor({}).ignored_syscalls, [])
+
+
+class TestProcessFilterConfig(unittest.TestCase):
+    """Test cases for the in-kernel process filter configuration"""
+
+    def test_comms_truncated_to_kernel_length(self):
+        """Test excluded names are encoded and cut to the kernel comm length"""
+        monitor = StatefulEBPFMonitor({'ebpf_excluded_comms': ['sshd', 'google_osconfig_agent', ''],
+                                       'ebpf_excluded_pids': [42, 7, 42]})
+        self.assertEqual(monitor.excluded_comms, [b'google_osconfig', b'sshd'])
+        self.assertEqual(monitor.excluded_pids, [7, 42])
+
+    def test_no_filter_by_default(self):
+        """Test nothing is filtered by process unless configured"""
+        monitor = StatefulEBPFMonitor({})
+        self.assertEqual(monitor.excluded_comms, [])
+        self.assertEqual(monitor.excluded_pids, [])
+
+
+class TestProbeDetach(unittest.TestCase):
+    """Test cases for detaching the attached probe on stop"""
+
+    def test_detaches_recorded_probe_only(self):
+        """Test stop_monitoring detaches exactly the probe attached at load"""
+        monitor = StatefulEBPFMonitor({})
+        monitor.bpf_program = MagicMock()
+        monitor._attached_probe = ('raw_tracepoint', 'sys_enter')
+        monitor.stop_monitoring()
+        monitor.bpf_program.detach_raw_tracepoint.assert_called_once_with(tp='sys_enter')
+        monitor.bpf_program.detach_tracepoint.assert_not_called()
+        self.assertIsNone(monitor._attached_probe)
+
+    def test_cleanup_releases_program(self):
+        """Test cleanup detaches the probe and releases the loaded program"""
+        monitor = StatefulEBPFMonitor({})
+        program = monitor.bpf_program = MagicMock()
+        monitor._attached_probe = ('tracepoint', 'raw_syscalls:sys_enter')
+        monitor.cleanup()
+        program.detach_tracepoint.assert_called_once_with(tp='raw_syscalls:sys_enter')
+        program.cleanup.assert_called_once_with()
+        self.assertIsNone(monitor.bpf_program)
+
+    def test_tracepoint_detach(self):
+        """Test regular tracepoints are detached by category:event name"""
+        monitor = StatefulEBPFMonitor({})
+        monitor.bpf_program = MagicMock()
+        monitor._attached_probe = ('tracepoint', 'raw_syscalls:sys_enter')
+        monitor._detach_probe()
+        monitor.bpf_program.detach_tracepoint.assert_called_once_with(tp='raw_syscalls:sys_enter')
+
+
+class TestEventParsing(unittest.TestCase):
+    """Test cases for raw event buffer parsing"""
+
+    def test_layout_matches_c_struct(self):
+        """Test the struct format has the same size as the C layout"""
+        self.assertEqual(_SYSCALL_EVENT.size, ctypes.sizeof(_SyscallEvent))
+
+    def test_parse_event(self):
+        """Test fields are read from the raw buffer and comm is NUL-trimmed"""
+        event = _SyscallEvent(4321, 59, b'python3', 1_700_000_000_123_456_789)
+        self.assertEqual(_parse_event(ctypes.addressof(event)),
+                         (4321, 59, 'python3', 1_700_000_000_123_456_789))
+
+
+if __name__ == '__main__':
+    unittest.main()
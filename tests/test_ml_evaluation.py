@@ -132,6 +132,21 @@ class TestMLEvaluation(unittest.TestCase):
         score_diff = anomalous_result.anomaly_score - normal_result.anomaly_score
         self.assertGreater(score_diff, 20.0)  # At least 20 point difference
     
+    def test_batch_matches_single_detection(self):
+        """Test batched detection scores each sample as a single call would"""
+        self.detector.train_models(self.training_data)
+        
+        samples = [
+            (['read', 'write', 'open', 'close', 'mmap'], {'cpu_percent': 10}, 101),
+            (['ptrace', 'mount', 'setuid', 'setgid', 'chroot'] * 5, {'cpu_percent': 90}, 102),
+        ]
+        batch = self.detector.detect_anomaly_ensemble_batch(samples)
+        self.assertEqual([r.pid for r in batch], [101, 102])
+        for (syscalls, process_info, pid), result in zip(samples, batch):
+            single = self.detector.detect_anomaly_ensemble(syscalls, process_info, pid)
+            self.assertAlmostEqual(result.anomaly_score, single.anomaly_score, places=6)
+            self.assertEqual(result.is_anomaly, single.is_anomaly)
+    
     def test_empty_syscall_handling(self):
         """Test handling of empty syscall lists"""
         self.detector.train_models(self.training_data)
@@ -9,6 +9,7 @@ import os
 # Add core to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
 from enhanced_security_agent import EnhancedRiskScorer
+from detection.risk_scorer import EnhancedRiskScorer as DetectionRiskScorer
 
 
 class TestEnhancedRiskScorer(unittest.TestCase):
@@ -85,6 +86,34 @@ class TestEnhancedRiskScorer(unittest.TestCase):
         self.assertGreater(score_with_anomaly, score_without_anomaly)
 
 
+
+class TestDetectionRiskScorer(unittest.TestCase):
+    """Test cases for the agent's risk scorer (core/detection)"""
+
+    def setUp(self):
+        self.scorer = DetectionRiskScorer({'base_risk_scores': {'read': 0}})
+
+    def test_base_score_uses_weights_and_default(self):
+        """Test the base score averages configured weights, defaulting unknown syscalls"""
+        # read=0 (override), ptrace=10, unknown=2 -> mean 4 -> base 40, weighted 0.4
+        score = self.scorer.update_risk_score(2000, ['read', 'ptrace', 'not_a_syscall'])
+        behavioral = 3 * (1 / 3) * 10  # Empty baseline: every frequency deviates fully
+        self.assertAlmostEqual(score, 40 * 0.4 + behavioral * 0.3)
+
+    def test_container_score(self):
+        """Test escape and privilege syscalls add container risk per call"""
+        self.assertEqual(self.scorer._calculate_container_score(1, ['mount', 'setuid', 'read', 'mount'], 'c1'), 13.0)
+        self.assertEqual(self.scorer._calculate_container_score(1, ['mount'], None), 0.0)
+
+    def test_baseline_total_tracks_capped_frequencies(self):
+        """Test the running baseline total matches the frequencies after capping"""
+        scorer = DetectionRiskScorer({'baseline_max_keys': 2})
+        scorer.update_risk_score(2001, ['read', 'read', 'write', 'open'])
+        baseline = scorer.process_baselines[2001]
+        self.assertEqual(len(baseline['syscall_frequencies']), 2)
+        self.assertEqual(baseline['syscall_total'], sum(baseline['syscall_frequencies'].values()))
+
+
 if __name__ == '__main__':
     unittest.main()
 
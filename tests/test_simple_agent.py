@@ -0,0 +1,541 @@
+"""
+Unit tests for SimpleSecurityAgent event handling
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+import sys
+import os
+import threading
+import time
+import logging
+from collections import deque
+
+# Add core to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+from simple_agent import (SimpleSecurityAgent, ChicagoTimeFormatter, NETWORK_SYSCALLS, MIN_SYSCALLS_FOR_ML,
+                          _exe_basename, _format_age, _is_unresolved_name, _simulated_port)
+from collectors.base import SyscallEvent
+
+
+def make_event(pid: int, syscall: str = 'read', comm: str = 'worker', exe: str = '/usr/bin/worker'):
+    """Build a SyscallEvent as a collector would deliver it"""
+    return SyscallEvent(pid=pid, syscall=syscall, uid=1000, comm=comm, exe=exe,
+                        timestamp=time.time(), event_info={})
+
+
+class TestSimpleAgentEventQueue(unittest.TestCase):
+    """Test cases for queued, batched event processing"""
+
+    def setUp(self):
+        self.agent = SimpleSecurityAgent({'event_batch_size': 4})
+        self.agent.anomaly_detector = None  # Keep event handling to tracking/scoring
+        self.agent.running = True
+
+    def tearDown(self):
+        self.agent.running = False
+
+    def test_process_batch_tracks_events(self):
+        """Test a batch updates per-process state and the syscall total"""
+        self.agent._process_batch([make_event(40001), make_event(40001, 'write'), make_event(40002)])
+        self.assertEqual(self.agent.stats['total_syscalls'], 3)
+        self.assertEqual(self.agent.processes[40001]['total_syscalls'], 2)
+        self.assertEqual(list(self.agent.processes[40001]['syscalls']), ['read', 'write'])
+
+    def test_process_batch_skips_agent_pid(self):
+        """Test the agent's own events are dropped before handling"""
+        self.agent._process_batch([make_event(self.agent.agent_pid), make_event(40004)])
+        self.assertNotIn(self.agent.agent_pid, self.agent.processes)
+        self.assertEqual(self.agent.stats['total_syscalls'], 1)
+
+    def test_sudo_wrapped_python_tracked_as_python3(self):
+        """Test a sudo-wrapped python3 keeps its resolved name when first tracked"""
+        self.agent._process_batch([make_event(40005, comm='sudo', exe='/usr/bin/python3.10')] * 2)
+        self.assertEqual(self.agent.processes[40005]['name'], 'python3')
+        self.assertEqual(self.agent.processes[40005]['total_syscalls'], 2)
+
+    def test_python_event_trace_logged_at_debug(self):
+        """Test python3 event traces after the first few events are DEBUG records"""
+        self.agent.stats['total_syscalls'] = 5
+        self.agent._log_debug = True
+        with self.assertLogs('security_agent.simple', level='DEBUG') as logs:
+            self.agent._process_batch([make_event(40006, comm='python3', exe='/usr/bin/python3')])
+        traces = [record for record in logs.records if 'EVENT RECEIVED' in record.getMessage()
+                  or 'Adding new process' in record.getMessage()]
+        self.assertEqual(len(traces), 2)
+        self.assertTrue(all(record.levelno == logging.DEBUG for record in traces))
+
+    def test_repeated_event_errors_logged_once(self):
+        """Test the same exception from one PID is logged once per interval and then counted"""
+        with patch.object(self.agent.risk_scorer, 'update_risk_score', side_effect=KeyError('name')):
+            with self.assertLogs('security_agent', level='ERROR') as logs:
+                self.agent._process_batch([make_event(40007), make_event(40007), make_event(40008)])
+        self.assertEqual(sum('KeyError processing event' in line for line in logs.output), 2)
+        self.assertEqual(self.agent.suppressed_event_errors, 1)
+
+    def test_full_queue_drops_and_counts(self):
+        """Test events beyond the queue bound are dropped and counted"""
+        self.agent.event_queue_size = 3
+        for _ in range(5):
+            self.agent._enqueue_event(make_event(40006))
+        self.assertEqual(len(self.agent._event_queue), 3)
+        self.assertEqual(self.agent.dropped_events, 2)
+
+    def test_batch_enqueue_fills_queue_and_counts_rest(self):
+        """Test a collector batch is queued up to the bound and the overflow counted"""
+        self.agent.event_queue_size = 5
+        self.agent._enqueue_events([make_event(40009)] * 3)
+        self.agent._enqueue_events([make_event(40009)] * 4)
+        self.agent._enqueue_events([make_event(40009)] * 2)
+        self.assertEqual(len(self.agent._event_queue), 5)
+        self.assertEqual(self.agent.dropped_events, 4)
+
+    def test_start_uses_batch_callback(self):
+        """Test the agent registers its batch enqueue with the collector"""
+        collector = MagicMock()
+        collector.start_monitoring_batch.return_value = False
+        with patch('simple_agent.validate_system', return_value=(True, [])), \
+                patch('simple_agent.get_collector', return_value=collector):
+            self.assertFalse(self.agent.start())
+        collector.start_monitoring_batch.assert_called_once_with(self.agent._enqueue_events)
+        collector.start_monitoring.assert_not_called()
+
+    def test_drain_thread_empties_queue(self):
+        """Test queued events are drained in batches by the drain thread"""
+        for _ in range(10):
+            self.agent._event_queue.append(make_event(40003))
+        thread = threading.Thread(target=self.agent._drain_events, daemon=True)
+        thread.start()
+        deadline = time.time() + 5.0
+        while self.agent.stats['total_syscalls'] < 10 and time.time() < deadline:
+            time.sleep(0.01)
+        self.agent.running = False
+        thread.join(1.0)
+        self.assertEqual(self.agent.stats['total_syscalls'], 10)
+        self.assertEqual(len(self.agent._event_queue), 0)
+
+
+class FakeBatchDetector:
+    """Fitted detector stand-in that records each batch it scores"""
+    is_fitted = True
+
+    def __init__(self, score=10.0):
+        self.score = score
+        self.batches = []
+
+    def detect_anomaly_ensemble_batch(self, samples):
+        self.batches.append([pid for _, _, pid in samples])
+        return [SimpleNamespace(anomaly_score=self.score, is_anomaly=False,
+                                explanation='normal', confidence=0.5) for _ in samples]
+
+
+class TestSimpleAgentMLBatch(unittest.TestCase):
+    """Test ML windows are queued per PID and scored in batches"""
+
+    def setUp(self):
+        self.agent = SimpleSecurityAgent({'ml_batch_delay': 60.0})
+        self.detector = FakeBatchDetector()
+        self.agent.anomaly_detector = self.detector
+        self.agent.running = True
+        self.agent._ml_last_flush = time.time()
+
+    def tearDown(self):
+        self.agent.running = False
+
+    def test_batch_scored_once_per_pid(self):
+        """Test one event batch yields a single ML call with each PID's latest window"""
+        events = [make_event(pid) for _ in range(20) for pid in (40201, 40202)]
+        self.agent._process_batch(events)
+        self.assertEqual(self.detector.batches, [[40201, 40202]])
+        self.assertEqual(self.agent.processes[40201]['anomaly_score'], 10.0)
+        self.assertEqual(self.agent.processes[40202]['anomaly_explanation'], 'normal')
+        self.assertFalse(self.agent._ml_pending)
+
+    def test_flush_at_batch_size(self):
+        """Test the queue is flushed early once ml_batch_size PIDs are waiting"""
+        self.agent.ml_batch_size = 2
+        self.agent._process_batch([make_event(pid) for pid in (40203, 40204, 40205) for _ in range(15)])
+        self.assertEqual(self.detector.batches, [[40203, 40204], [40205]])
+        self.assertFalse(self.agent._ml_pending)
+
+    def test_inference_runs_outside_lock(self):
+        """Test queued windows are scored without holding processes_lock"""
+        lock_held = []
+        score = self.detector.detect_anomaly_ensemble_batch
+
+        def detect(samples):
+            lock_held.append(self.agent.processes_lock._is_owned())
+            return score(samples)
+        self.detector.detect_anomaly_ensemble_batch = detect
+        self.agent._process_batch([make_event(40209)] * 15)
+        self.assertEqual(lock_held, [False])
+
+    def test_risk_updated_with_new_anomaly_score(self):
+        """Test a scored window updates the risk of the event it was queued for"""
+        self.detector.score = 90.0
+        with patch.object(self.agent.risk_scorer, 'update_risk_score', return_value=10.0):
+            self.agent._process_batch([make_event(40210)] * 15)
+        proc = self.agent.processes[40210]
+        self.assertEqual(proc['anomaly_score'], 90.0)
+        self.assertAlmostEqual(proc['risk_score'], 10.0 + 90.0 * self.agent.risk_scorer.anomaly_weight)
+        self.assertIn(40210, self.agent._high_risk_pids)
+
+    def test_unfitted_detector_loads_once_per_pid(self):
+        """Test an unfitted detector gets one model load attempt per process"""
+        self.detector.is_fitted = False
+        self.detector._load_models = lambda: self.detector.batches.append('load')
+        self.agent._process_batch([make_event(40207)] * 3 + [make_event(40208)])
+        self.assertEqual(self.detector.batches, ['load', 'load'])
+
+    def test_dropped_process_skipped(self):
+        """Test results for processes removed while queued are discarded"""
+        self.agent._ml_pending[40206] = (['read'] * 15, {})
+        self.agent._flush_ml_pending(time.time())
+        self.assertNotIn(40206, self.agent.processes)
+
+
+class TestSimpleAgentStateWriter(unittest.TestCase):
+    """Test cases for detection-triggered state file writes"""
+
+    def test_burst_of_requests_coalesces(self):
+        """Test requests arriving together produce a single write off the caller's thread"""
+        agent = SimpleSecurityAgent({'enable_ml': False, 'state_write_delay': 0.1})
+        writes = []
+        agent._write_state_file = lambda: writes.append(threading.current_thread())
+        agent.running = True
+        thread = threading.Thread(target=agent._state_writer_loop, daemon=True)
+        thread.start()
+        for _ in range(3):
+            agent._state_write_requested.set()
+        deadline = time.time() + 5.0
+        while not writes and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.2)
+        agent.running = False
+        thread.join(2.0)
+        self.assertEqual(writes, [thread])
+
+
+class TestSyscallNormalization(unittest.TestCase):
+    """Test cases for syscall and exe name normalization"""
+
+    def test_network_syscall_event_analyzed(self):
+        """Test a canonical network syscall name reaches connection analysis"""
+        agent = SimpleSecurityAgent({'enable_ml': False})
+        agent.running = True
+        with patch.object(agent.connection_analyzer, 'analyze_connection', return_value=None) as analyze:
+            agent._process_batch([make_event(40030, syscall='connect'), make_event(40030, syscall='read')])
+        agent.running = False
+        self.assertEqual(analyze.call_count, 1)
+        self.assertIn('connect', NETWORK_SYSCALLS)
+
+    def test_unresolved_name(self):
+        """Test empty names and pid_ placeholders count as unresolved"""
+        for name in (None, '', 'pid_1234'):
+            self.assertTrue(_is_unresolved_name(name))
+        self.assertFalse(_is_unresolved_name('python3'))
+
+    def test_simulated_port(self):
+        """Test stand-in ports are stable per seed and inside the requested span"""
+        self.assertEqual(_simulated_port('curl_10.0.0.1', 200), _simulated_port('curl_10.0.0.1', 200))
+        ports = {_simulated_port(f'nmap_10.0.0.1_{i}', 2000) for i in range(100)}
+        self.assertTrue(all(8000 <= port < 10000 for port in ports))
+        self.assertGreater(len(ports), 90)
+
+    def test_exe_basename(self):
+        """Test exe basenames match os.path.basename and are shared objects"""
+        for exe in ('/usr/bin/python3', 'python3', '/usr/bin/'):
+            self.assertEqual(_exe_basename(exe), os.path.basename(exe))
+        self.assertIs(_exe_basename('/usr/bin/python3'), _exe_basename('/opt/py/python3'))
+
+
+class TestSimpleAgentCounts(unittest.TestCase):
+    """Test cases for current process counts"""
+
+    def test_active_and_anomalous_counts(self):
+        """Test stale processes are ignored and anomalies counted among active ones"""
+        agent = SimpleSecurityAgent({})
+        now = time.time()
+        agent.processes = {
+            1: {'last_update': now - 1, 'anomaly_score': 75.0},
+            2: {'last_update': now - 1, 'anomaly_score': 10.0},
+            3: {'last_update': now - agent.process_timeout - 1, 'anomaly_score': 90.0},
+        }
+        self.assertEqual(agent._current_process_counts(now), (2, 1))
+
+
+    def test_recent_detections_window(self):
+        """Test only detections inside the window are counted, history is kept"""
+        agent = SimpleSecurityAgent({'enable_ml': False})
+        now = time.time()
+        for age in (900, 700, 500, 10, 1):
+            agent.recent_c2_detections.append(now - age)
+        self.assertEqual(agent._count_recent_detections(agent.recent_c2_detections), 3)
+        self.assertEqual(agent._count_recent_detections(agent.recent_c2_detections, window_seconds=60), 2)
+        self.assertEqual(len(agent.recent_c2_detections), 5)
+        self.assertEqual(agent._count_recent_detections(agent.recent_scan_detections), 0)
+
+
+    def test_export_state_counts_and_top_processes(self):
+        """Test export_state counts high-risk/anomalous processes and lists the riskiest first"""
+        agent = SimpleSecurityAgent({'enable_ml': False, 'risk_threshold': 30.0})
+        agent.startup_time -= agent.warmup_period_seconds
+        now = time.time()
+        agent.processes = {
+            pid: {'name': f'job{pid}', 'risk_score': float(pid), 'anomaly_score': 40.0 if pid == 5 else 0.0,
+                  'syscalls': deque(['read']), 'total_syscalls': 1, 'last_update': now}
+            for pid in range(60)
+        }
+        state = agent.export_state()
+        self.assertEqual(state['stats']['high_risk'], 30)
+        self.assertEqual(state['stats']['anomalies'], 1)
+        self.assertEqual(len(state['processes']), 50)
+        self.assertEqual(state['processes'][0]['pid'], 59)
+
+
+    def test_recent_syscalls_cached_until_next_syscall(self):
+        """Test export_state reuses a process's recent-syscall list until it sees a new syscall"""
+        agent = SimpleSecurityAgent({'enable_ml': False})
+        agent.running = True
+        agent._process_batch([make_event(40022, sc) for sc in ('read', 'write', 'openat')])
+        first = agent.export_state()['processes'][0]['recent_syscalls']
+        self.assertEqual(first, ['read', 'write', 'openat'])
+        self.assertIs(agent.export_state()['processes'][0]['recent_syscalls'], first)
+        agent._process_batch([make_event(40022, 'close')])
+        self.assertEqual(agent.export_state()['processes'][0]['recent_syscalls'][-1], 'close')
+        agent.running = False
+
+
+class TestSimpleAgentProcessInfo(unittest.TestCase):
+    """Test cases for per-process resource sampling"""
+
+    def setUp(self):
+        self.agent = SimpleSecurityAgent({'enable_ml': False})
+
+    def test_sample_is_reused_within_interval(self):
+        """Test a process is resampled only once the interval has passed, without blocking"""
+        proc = {}
+        now = time.time()
+        started = time.perf_counter()
+        info = self.agent._sample_process_info(os.getpid(), proc, now)
+        self.assertLess(time.perf_counter() - started, 0.1)
+        self.assertGreaterEqual(info['num_threads'], 1)
+        self.assertIs(self.agent._sample_process_info(os.getpid(), proc, now + 0.1), info)
+        process = proc['psutil_process']
+        self.assertIsNot(self.agent._sample_process_info(os.getpid(), proc, now + 1.0), info)
+        self.assertIs(proc['psutil_process'], process)
+
+    def test_missing_process(self):
+        """Test a vanished process yields empty info"""
+        self.assertEqual(self.agent._sample_process_info(999999999, {}, time.time()), {})
+
+    def test_psutil_name_reuses_process_and_remembers_failure(self):
+        """Test alert name lookups share the cached Process and don't retry a failed PID"""
+        proc = {}
+        self.agent._sample_process_info(os.getpid(), proc, time.time())
+        process = proc['psutil_process']
+        self.assertEqual(self.agent._psutil_process_name(os.getpid(), proc), process.name())
+        self.assertIs(proc['psutil_process'], process)
+        gone = {}
+        self.assertIsNone(self.agent._psutil_process_name(999999999, gone))
+        with patch('simple_agent.psutil.Process') as process_cls:
+            self.assertIsNone(self.agent._psutil_process_name(999999999, gone))
+            process_cls.assert_not_called()
+
+    def test_short_windows_not_sampled(self):
+        """Test resource usage is only sampled once the window is long enough for ML"""
+        self.agent.anomaly_detector = None
+        self.agent.running = True
+        with patch.object(self.agent, '_sample_process_info', return_value={}) as sample:
+            self.agent._process_batch([make_event(40301)] * (MIN_SYSCALLS_FOR_ML - 1))
+            sample.assert_not_called()
+            self.agent._process_batch([make_event(40301)])
+            sample.assert_called_once()
+        self.agent.running = False
+
+
+class TestDashboardFormatting(unittest.TestCase):
+    """Test cases for memoized dashboard cell formatting"""
+
+    def test_format_age_units(self):
+        """Test ages are shown in seconds, minutes or hours"""
+        self.assertEqual(_format_age(42), "[dim]  42s[/dim]")
+        self.assertEqual(_format_age(125), "[dim]   2m[/dim]")
+        self.assertEqual(_format_age(7300), "[dim]   2h[/dim]")
+
+
+class TestChicagoTimeFormatter(unittest.TestCase):
+    """Test cases for log timestamp formatting"""
+
+    def test_same_second_reuses_formatted_time(self):
+        """Test records within one second share a timestamp and a new second reformats"""
+        formatter = ChicagoTimeFormatter('%(asctime)s %(message)s')
+        record = logging.makeLogRecord({'msg': 'x', 'created': 1700000000.25})
+        later = logging.makeLogRecord({'msg': 'x', 'created': 1700000000.75})
+        next_second = logging.makeLogRecord({'msg': 'x', 'created': 1700000001.0})
+        first = formatter.formatTime(record)
+        self.assertIs(formatter.formatTime(later), first)
+        self.assertNotEqual(formatter.formatTime(next_second), first)
+        self.assertEqual(formatter.formatTime(record, '%Y'), '2023')
+
+
+class TestSimpleAgentLazyInit(unittest.TestCase):
+    """Test cases for deferred ML/UI initialization"""
+
+    def test_ml_disabled(self):
+        """Test enable_ml: False leaves the agent without an anomaly detector"""
+        agent = SimpleSecurityAgent({'enable_ml': False})
+        self.assertIsNone(agent.anomaly_detector)
+
+    def test_console_created_on_first_use(self):
+        """Test the Rich console is only built when accessed, then reused"""
+        agent = SimpleSecurityAgent({'enable_ml': False})
+        self.assertNotIn('console', agent.__dict__)
+        self.assertIs(agent.console, agent.console)
+
+    def test_anomalous_pids_follow_scores(self):
+        """Test the anomalous-PID set tracks score changes without rescanning processes"""
+        agent = SimpleSecurityAgent({'enable_ml': False})
+        agent._track_anomaly_score(1, 85.0)
+        agent._track_anomaly_score(2, 20.0)
+        self.assertEqual(agent._anomalous_pids, {1})
+        agent._track_anomaly_score(1, 40.0)
+        self.assertEqual(agent._anomalous_pids, set())
+
+    def test_event_path_tracks_anomaly_score(self):
+        """Test handling an event records the process's current anomaly score"""
+        agent = SimpleSecurityAgent({'enable_ml': False})
+        agent.running = True
+        agent._process_batch([make_event(40020)])
+        agent.processes[40020]['anomaly_score'] = 90.0
+        agent._process_batch([make_event(40020)])
+        self.assertIn(40020, agent._anomalous_pids)
+        agent.running = False
+
+    def test_high_risk_count_follows_scores(self):
+        """Test stats['high_risk'] counts tracked PIDs at or above the threshold after warm-up"""
+        agent = SimpleSecurityAgent({'enable_ml': False, 'risk_threshold': 30.0})
+        agent.startup_time -= agent.warmup_period_seconds
+        agent._track_risk_score(1, 55.0, 30.0)
+        agent._track_risk_score(2, 10.0, 30.0)
+        agent.running = True
+        with patch.object(agent.risk_scorer, 'update_risk_score', return_value=80.0):
+            agent._process_batch([make_event(40021)])
+        self.assertEqual(agent._high_risk_pids, {1, 40021})
+        self.assertEqual(agent.stats['high_risk'], 2)
+        with patch.object(agent.risk_scorer, 'update_risk_score', return_value=5.0):
+            agent._process_batch([make_event(40021)])
+        self.assertEqual(agent._high_risk_pids, {1})
+        agent.running = False
+
+
+class TestSimpleAgentNameCache(unittest.TestCase):
+    """Test cases for the bounded process name cache"""
+
+    def setUp(self):
+        self.agent = SimpleSecurityAgent({'process_name_cache_size': 3})
+        self.agent.anomaly_detector = None
+
+    def test_evicts_least_recently_used(self):
+        """Test the cache stays bounded and a cache hit refreshes recency"""
+        now = time.time()
+        for pid in (1001, 1002, 1003):
+            self.agent._cache_process_name(pid, f'proc{pid}', now)
+        self.assertEqual(self.agent._resolve_process_name(1001), 'proc1001')
+        self.agent._cache_process_name(1004, 'proc1004', now)
+        self.assertEqual(list(self.agent.process_name_cache), [1003, 1001, 1004])
+
+    def test_event_path_keeps_cache_bounded(self):
+        """Test names cached from event comm respect the size cap"""
+        self.agent.running = True
+        self.agent._process_batch([make_event(50000 + i, comm=f'job{i}') for i in range(6)])
+        self.assertEqual(len(self.agent.process_name_cache), 3)
+        self.agent.running = False
+
+
+    def test_proc_fallback_uses_cached_dirfd(self):
+        """Test /proc lookups reuse one directory fd per PID and drop it on stop"""
+        pid = os.getpid()
+        expected = open(f'/proc/{pid}/comm').read().strip()
+        self.assertEqual(self.agent._resolve_process_name(pid), expected)
+        self.agent.process_name_cache.clear()
+        dirfd = self.agent._proc_dirfds[pid]
+        self.assertEqual(self.agent._resolve_process_name(pid), expected)
+        self.assertEqual(self.agent._proc_dirfds[pid], dirfd)
+        self.agent.stop()
+        self.assertEqual(len(self.agent._proc_dirfds), 0)
+
+    def test_proc_fallback_missing_process(self):
+        """Test a missing PID falls back to pid_ form and caches no dirfd"""
+        self.assertEqual(self.agent._resolve_process_name(999999999), 'pid_999999999')
+        self.assertNotIn(999999999, self.agent._proc_dirfds)
+
+    def test_cmdline_fallback_uses_first_arg_basename(self):
+        """Test an empty comm falls back to the basename of cmdline's first argument"""
+        proc_files = {'comm': b'\n', 'cmdline': b'/opt/tools/runner\x00--config\x00/etc/a/b\x00'}
+        with patch.object(self.agent, '_read_proc_file', side_effect=lambda pid, name, size: proc_files[name]):
+            self.assertEqual(self.agent._resolve_process_name(50200), 'runner')
+
+    def test_event_comm_restamped_only_when_stale_or_changed(self):
+        """Test repeat events under one comm leave the cache entry untouched until it ages"""
+        self.agent.running = True
+        self.agent._process_batch([make_event(50100, comm='job')])
+        entry = self.agent.process_name_cache[50100]
+        self.agent._process_batch([make_event(50100, comm='job')])
+        self.assertIs(self.agent.process_name_cache[50100], entry)
+        self.agent._process_batch([make_event(50100, comm='job2')])
+        self.assertEqual(self.agent.process_name_cache[50100][0], 'job2')
+        self.agent.running = False
+
+
+class TestSimpleAgentExclusion(unittest.TestCase):
+    """Test cases for excluded process name matching"""
+
+    def setUp(self):
+        self.agent = SimpleSecurityAgent({'excluded_processes': ['/opt/vendor/Agentd']})
+        self.agent.anomaly_detector = None
+
+    def test_exact_and_case_insensitive(self):
+        """Test excluded names match exactly, ignoring case"""
+        self.assertTrue(self.agent._is_excluded_name('sshd'))
+        self.assertTrue(self.agent._is_excluded_name('NetworkManager'))
+        self.assertTrue(self.agent._is_excluded_name('networkmanager'))
+
+    def test_path_basenames(self):
+        """Test paths match by basename in either direction"""
+        self.assertTrue(self.agent._is_excluded_name('/usr/sbin/sshd'))
+        self.assertTrue(self.agent._is_excluded_name('agentd'))
+
+    def test_substrings_not_excluded(self):
+        """Test names merely containing an excluded name are still monitored"""
+        self.assertFalse(self.agent._is_excluded_name('python3'))
+        self.assertFalse(self.agent._is_excluded_name('shadow_reader'))
+        self.assertFalse(self.agent._is_excluded_name('s'))
+
+    def test_verdict_cached_per_name(self):
+        """Test repeat names are answered from the per-name cache"""
+        self.assertTrue(self.agent._is_excluded_name('Cron'))
+        self.assertFalse(self.agent._is_excluded_name('nginx'))
+        self.assertEqual(self.agent._excluded_name_cache, {'Cron': True, 'nginx': False})
+
+    def test_excluded_event_not_tracked(self):
+        """Test events from excluded processes are skipped"""
+        self.agent.running = True
+        self.agent._handle_event(make_event(40010, comm='cron', exe='/usr/sbin/cron'))
+        self.assertNotIn(40010, self.agent.processes)
+        self.agent.running = False
+
+    def test_removed_process_releases_connection_state(self):
+        """Test a tracked process that turns out to be excluded is dropped from the analyzer too"""
+        self.agent.running = True
+        self.agent._handle_event(make_event(40011))
+        self.agent.processes[40011]['name'] = 'cron'
+        self.agent.connection_analyzer.analyze_connection(40011, '10.0.0.1', 80, timestamp=1.0)
+        self.agent._handle_event(make_event(40011))
+        self.assertNotIn(40011, self.agent.processes)
+        self.assertNotIn(40011, self.agent.connection_analyzer.ports_seen)
+        self.agent.running = False
+
+
+if __name__ == '__main__':
+    unittest.main()